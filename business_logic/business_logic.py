@@ -1,5 +1,8 @@
 from datetime import date
+from typing import Dict, List, Optional
 
+import numpy as np
+from numpy.typing import ArrayLike
 
 from utilities.logger import Logger
 
@@ -27,6 +30,37 @@ class FilmBusinessLogic:
             raise AssertionError({'availability': (
                 "The availability shouldn't be higher than stock")})
 
+    @staticmethod
+    def get_viewing_order(prequels: Dict[int, Optional[int]]) -> List[int]:
+        """
+        Order the items (seasons or chapters) following their prequels, the
+        items on a cycle of prequels are left at the end
+
+        Args:
+            prequels (Dict[int, Optional[int]]): Id of the prequel of each
+            item
+
+        Return:
+            order (List[int]): Ids of the items in viewing order
+        """
+        sequels = {prequel_id: item_id
+                   for item_id, prequel_id in prequels.items()
+                   if prequel_id in prequels}
+        order = []
+        visited = set()
+
+        for item_id in sorted(prequels):
+            # Only the items without a prequel in the list start a chain
+            if prequels[item_id] in prequels:
+                continue
+            while item_id is not None and item_id not in visited:
+                visited.add(item_id)
+                order.append(item_id)
+                item_id = sequels.get(item_id)
+
+        return order + [item_id for item_id in sorted(prequels)
+                        if item_id not in visited]
+
 
 class PersonBusinessLogic:
     """
@@ -199,3 +233,79 @@ class RentBusinessLogic:
 
         Logger.debug(f"get_actual_cost: {actual_cost}")
         return actual_cost
+
+    # Batch methods, they price many rents at once with NumPy arrays
+    @staticmethod
+    def get_extra_costs(amounts_film: ArrayLike, extra_days: ArrayLike,
+                        films_price_by_day: ArrayLike) -> np.ndarray:
+        """
+        Get the extra cost of many rents at once, same as get_extra_cost
+
+        Args:
+            amounts_film (ArrayLike): Amount of films of each rent
+            extra_days (ArrayLike): Amount of extra days of each rent
+            films_price_by_day (ArrayLike): The price by day of renting the
+            film of each rent
+
+        Return:
+            costs (np.ndarray): the extra cost of each rent
+        """
+        amounts_film = np.asarray(amounts_film, dtype=np.float64)
+        extra_days = np.asarray(extra_days, dtype=np.float64)
+        films_price_by_day = np.asarray(films_price_by_day, dtype=np.float64)
+
+        return extra_days * (amounts_film * films_price_by_day
+                             + extra_days + 1)
+
+    @classmethod
+    def get_rent_costs(cls, amounts_film: ArrayLike, star_dates: ArrayLike,
+                       return_dates: ArrayLike,
+                       actual_return_dates: ArrayLike,
+                       films_price_by_day: ArrayLike) -> np.ndarray:
+        """
+        Get the cost of many rents at once, same as get_rent_cost. The dates
+        can be dates or datetime64[D] arrays (faster), None or NaT means that
+        the rent has not been returned yet
+
+        Args:
+            amounts_film (ArrayLike): Amount of films of each rent
+            star_dates (ArrayLike): Star date of each rent
+            return_dates (ArrayLike): Return date of each rent
+            actual_return_dates (ArrayLike): Actual return date of each rent
+            films_price_by_day (ArrayLike): The price by day of renting the
+            film of each rent
+
+        Return:
+            costs (np.ndarray): the cost of each rent, NaN where the cost is
+            not applicable (N.A)
+        """
+        amounts_film = np.asarray(amounts_film, dtype=np.float64)
+        films_price_by_day = np.asarray(films_price_by_day, dtype=np.float64)
+        star_dates = np.asarray(star_dates, dtype='datetime64[D]')
+        return_dates = np.asarray(return_dates, dtype='datetime64[D]')
+        actual_return_dates = np.asarray(actual_return_dates,
+                                         dtype='datetime64[D]')
+
+        returned = ~np.isnat(actual_return_dates)
+        # NaT comparisons are always False, so only returned rents are late
+        late = actual_return_dates > return_dates
+
+        amount_days_normal_cost = (return_dates - star_dates).astype(
+            np.float64)
+        amount_days_actual_cost = np.where(
+            returned, (actual_return_dates - star_dates).astype(np.float64),
+            0)
+
+        theoretical_costs = (amounts_film * amount_days_normal_cost
+                             * films_price_by_day)
+        costs = np.where(returned,
+                         amounts_film * amount_days_actual_cost
+                         * films_price_by_day,
+                         theoretical_costs)
+
+        extra_costs = cls.get_extra_costs(
+            amounts_film, amount_days_actual_cost - amount_days_normal_cost,
+            films_price_by_day)
+        costs = np.where(late, theoretical_costs + extra_costs, costs)
+
+        return np.where(costs > 0, costs, np.nan)
@@ -1,5 +1,9 @@
+import random
 import unittest
-from datetime import date
+from datetime import date, timedelta
+
+import numpy as np
+
 from business_logic.business_logic import (FilmBusinessLogic,
                                            PersonBusinessLogic,
                                            RentBusinessLogic)
@@ -28,6 +32,11 @@ class BusinessLogicTestCase(unittest.TestCase):
             FilmBusinessLogic.validate_stock_greater_availability(
                 stock, availability)
 
+    def test_get_viewing_order(self):
+        prequels = {1: 3, 2: None, 3: 2, 4: 99, 5: None, 6: 7, 7: 6}
+        self.assertEqual(FilmBusinessLogic.get_viewing_order(prequels),
+                         [2, 3, 1, 4, 5, 6, 7])
+
     @patch("business_logic.business_logic.date")
     def test_get_age_by_birthday(self, mock_today):
         # Set mock
@@ -56,6 +65,44 @@ class BusinessLogicTestCase(unittest.TestCase):
                           self.actual_return_date,
                           self.price_by_day))
 
+    def test_get_rent_costs(self):
+        costs = RentBusinessLogic.get_rent_costs(
+            [self.amount, self.amount],
+            [self.start_date, self.start_date],
+            [self.return_date, self.return_date],
+            [None, self.actual_return_date],
+            [self.price_by_day, self.price_by_day])
+
+        self.assertEqual([20, 92], costs.tolist())
+
+    def test_get_rent_costs_not_applicable(self):
+        costs = RentBusinessLogic.get_rent_costs([self.amount],
+                                                 [self.start_date],
+                                                 [self.return_date],
+                                                 [None], [0])
+
+        self.assertTrue(np.isnan(costs[0]))
+
+    def test_get_rent_costs_matches_get_rent_cost(self):
+        rng = random.Random(0)
+        rents = []
+        for i in range(1000):
+            start_date = self.start_date + timedelta(days=rng.randint(0, 99))
+            return_date = start_date + timedelta(days=rng.randint(1, 15))
+            actual_return_date = rng.choice(
+                [None, start_date + timedelta(days=rng.randint(1, 20))])
+            rents.append((rng.randint(0, 9), start_date, return_date,
+                          actual_return_date, rng.uniform(0, 100)))
+
+        costs = RentBusinessLogic.get_rent_costs(*zip(*rents))
+
+        for rent, cost in zip(rents, costs.tolist()):
+            expected = RentBusinessLogic.get_rent_cost(*rent)
+            if expected == 'N.A':
+                self.assertTrue(np.isnan(cost))
+            else:
+                self.assertEqual(expected, cost)
+
 
 if __name__ == '__main__':
     unittest.main()
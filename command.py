@@ -1,361 +1,568 @@
+import asyncio
+import logging
+import os
 import random
-from datetime import date
+import time
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice, repeat
+from multiprocessing import Pool
+from typing import Iterable, Iterator, Tuple
 
 import typer
-from pydantic import ValidationError
+from redis.exceptions import RedisError
+from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 
+from business_logic.business_logic import RentBusinessLogic
+
 from databases.db import get_db_session
 from models.films_and_rents import Film, Category, Season, Chapter, Rent, \
-    RentCreate
+    Poster
 from models.persons import Role, Person, FilmPersonRole, Client
+from models.imports import IMPORT_BATCH_SIZE, PersonImport
+from models.leaderboard import FilmLeaderboard
+from models.reports import RevenueRollup
 from models.users import User
+from s3_events.storage import get_storage_service
 from security.security import get_password_hash
 from utilities.generators_functions import (get_random_string, gen_date,
                                             gen_random_float, gen_random_int,
                                             gen_random_film_type,
                                             gen_person_gender,
                                             gen_person_type, gen_phone,
-                                            gen_number)
+                                            gen_number, DATASET_PROFILES,
+                                            init_rents_worker,
+                                            gen_rents_chunk)
 
 app = typer.Typer()
 session = get_db_session()
 
+# The rent costs are logged as debug, too verbose for bulk seeding
+logging.disable(logging.DEBUG)
 
-@app.command()
-def usersgen(user_type: str = typer.Option("-a",
-                                           help='Define the'
-                                                ' account type')):
-    for i in range(10):
-        email = get_random_string(15)
-        password = get_random_string(15)
+count_option = typer.Option(10, help='Amount of records to create')
+batch_size_option = typer.Option(10000, help='Records inserted by commit')
 
-        try:
-            if user_type == "-a":
-                new_user = User(
-                    username=f'{email}@filmrentalsystem.com',
-                    password=password,
-                    is_admin=True,
-                    is_employee=False)
-
-                session.add(new_user)
-                session.commit()
-
-            elif user_type == "-e":
-                new_user = User(
-                    username=f'{email}@filmrentalsystem.com',
-                    password=get_password_hash(password),
-                    is_admin=False,
-                    is_employee=True)
-
-                session.add(new_user)
-                session.commit()
-            else:
-                new_user = User(
-                    username=f'{email}@filmrentalsystem.com',
-                    password=get_password_hash(password),
-                    is_admin=False,
-                    is_employee=False)
-
-                session.add(new_user)
-                session.commit()
-
-            typer.echo(f'Email: {email}  password:({password}) '
-                       f'user created!')
-        except IntegrityError:
-            session.rollback()
-            typer.echo('An error has occurred during the creation '
-                       'of the account')
 
+def bulk_insert(model, rows: Iterable[dict], batch_size: int) -> int:
+    """
+    Insert the rows in batches, using one multi-row insert and one commit
+    by batch
 
-@app.command()
-def categoriesgen():
-    for i in range(10):
-        name = get_random_string(15)
-        description = get_random_string(15)
+    Args:
+        model: Table model of the rows
+        rows (Iterable[dict]): Mappings of the rows to insert
+        batch_size (int): Amount of rows inserted by commit
 
-        try:
-            new_category = Category(
-                name=name,
-                description=description)
+    Return:
+        inserted (int): Amount of inserted rows
+    """
+    table_name = model.__tablename__
+    inserted = 0
+    rows = iter(rows)
 
-            session.add(new_category)
+    while batch := list(islice(rows, batch_size)):
+        try:
+            session.bulk_insert_mappings(model, batch)
             session.commit()
+            inserted += len(batch)
 
-            typer.echo(f'name: {name}  description:({description}) '
-                       f'category created!')
+            typer.echo(f'{inserted} {table_name} created!')
 
         except IntegrityError:
             session.rollback()
-            typer.echo('An error has occurred during the creation '
-                       'of the category')
+            typer.echo(f'An error has occurred during the creation '
+                       f'of {len(batch)} {table_name}')
+    return inserted
 
 
-@app.command()
-def filmsgen():
-    for i in range(10):
-        title = get_random_string(15)
-        description = get_random_string(15)
-        release_date = gen_date()
+def load_ids(column) -> array:
+    """
+    Load once all the ids of a table in a compact array, so each generated
+    row can pick a random parent in O(1)
 
-        statement = select(Category)
-        items_category = list(session.exec(statement).all())
-        category = random.choice(items_category)
+    Args:
+        column: Id column of the table
 
-        price_by_day = gen_random_float()
-        stock = gen_random_int()
-        film_type = gen_random_film_type()
+    Return:
+        ids (array): Ids of the table
+    """
+    statement = select(column).order_by(column).execution_options(
+        stream_results=True, yield_per=100000)
+    ids = array('q', session.exec(statement))
 
-        try:
-            new_film = Film(title=title,
-                            description=description,
-                            release_date=release_date,
-                            category_id=category.id,
-                            price_by_day=price_by_day,
-                            stock=stock,
-                            film_type=film_type,
-                            film_prequel_id=None,
-                            availability=stock)
-
-            session.add(new_film)
-            session.commit()
+    if not ids:
+        typer.echo(f'There are no records in {column.table.name}')
+        raise typer.Exit(code=1)
+    return ids
 
-            typer.echo(f'title: {title} , description:{description}'
-                       f' release_date:{release_date},'
-                       f'category:{category}, '
-                       f'price_by_day:{price_by_day},'
-                       f'stock:{stock},'
-                       f'availability:{stock},'
-                       f'film_type:{film_type},'
-                       f' film created!')
 
-        except IntegrityError:
-            session.rollback()
-            typer.echo('An error has occurred during the creation '
-                       'of the film')
+def gen_user_rows(emails: Iterable[str], passwords: Iterable[str],
+                  hashes: Iterable[str], user_type: str,
+                  echo_passwords: bool) -> Iterator[dict]:
+    for email, password, password_hash in zip(emails, passwords, hashes):
+        if echo_passwords:
+            typer.echo(f'Email: {email}  password:({password})')
+
+        yield dict(username=f'{email}@filmrentalsystem.com',
+                   password=password_hash,
+                   is_admin=user_type == "-a",
+                   is_employee=user_type == "-e")
+
+
+def gen_users(count: int, user_type: str, workers: int,
+              reuse_hash: bool) -> Iterator[dict]:
+    emails = [get_random_string(15) for i in range(count)]
+
+    if reuse_hash:
+        # Hashing is the slow part, synthetic accounts can share one hash
+        password = get_random_string(15)
+        typer.echo(f'password:({password}) shared by all the accounts')
+
+        yield from gen_user_rows(emails, repeat(password),
+                                 repeat(get_password_hash(password)),
+                                 user_type, echo_passwords=False)
+        return
+
+    passwords = [get_random_string(15) for i in range(count)]
+
+    # bcrypt is CPU bound, the passwords are hashed by a process pool
+    with Pool(workers) as pool:
+        hashes = pool.imap(get_password_hash, passwords, chunksize=64)
+        yield from gen_user_rows(emails, passwords, hashes, user_type,
+                                 echo_passwords=True)
 
 
 @app.command()
-def seasonsgen():
-    for i in range(10):
-        title = get_random_string(15)
+def usersgen(user_type: str = typer.Option("-a",
+                                           help='Define the'
+                                                ' account type'),
+             count: int = count_option,
+             batch_size: int = batch_size_option,
+             workers: int = typer.Option(os.cpu_count(),
+                                         help='Processes hashing the '
+                                              'passwords'),
+             reuse_hash: bool = typer.Option(False,
+                                             help='Use the same password '
+                                                  'for all the accounts')):
+    bulk_insert(User, gen_users(count, user_type, workers, reuse_hash),
+                batch_size)
 
-        statement = select(Film)
-        items_film = list(session.exec(statement).all())
-        film = random.choice(items_film)
 
-        try:
-            new_season = Season(title=title,
-                                film_id=film.id,
-                                season_prequel_id=None)
+def gen_categories(count: int) -> Iterator[dict]:
+    for i in range(count):
+        yield dict(name=get_random_string(15),
+                   description=get_random_string(15))
 
-            session.add(new_season)
-            session.commit()
 
-            typer.echo(f'film: {film} , title:{title}'
-                       f' season created!')
+@app.command()
+def categoriesgen(count: int = count_option,
+                  batch_size: int = batch_size_option):
+    bulk_insert(Category, gen_categories(count), batch_size)
 
-        except IntegrityError:
-            session.rollback()
-            typer.echo('An error has occurred during the creation '
-                       'of the season')
+
+def gen_films(count: int) -> Iterator[dict]:
+    category_ids = load_ids(Category.id)
+
+    for i in range(count):
+        stock = gen_random_int()
+
+        yield dict(title=get_random_string(15),
+                   description=get_random_string(15),
+                   release_date=gen_date(),
+                   category_id=random.choice(category_ids),
+                   price_by_day=gen_random_float(),
+                   stock=stock,
+                   film_type=gen_random_film_type(),
+                   film_prequel_id=None,
+                   availability=stock)
 
 
 @app.command()
-def chaptersgen():
-    for i in range(10):
-        title = get_random_string(15)
+def filmsgen(count: int = count_option,
+             batch_size: int = batch_size_option):
+    bulk_insert(Film, gen_films(count), batch_size)
 
-        statement = select(Season)
-        items_season = list(session.exec(statement).all())
-        season = random.choice(items_season)
 
-        try:
-            new_chapter = Chapter(title=title,
-                                  season_id=season.id,
-                                  chapter_prequel_id=None)
+def gen_seasons(count: int) -> Iterator[dict]:
+    film_ids = load_ids(Film.id)
 
-            session.add(new_chapter)
-            session.commit()
+    for i in range(count):
+        yield dict(title=get_random_string(15),
+                   film_id=random.choice(film_ids),
+                   season_prequel_id=None)
 
-            typer.echo(f'season: {season} , title:{title}'
-                       f' chapter created!')
 
-        except IntegrityError:
-            session.rollback()
-            typer.echo('An error has occurred during the creation '
-                       'of the chapter')
+@app.command()
+def seasonsgen(count: int = count_option,
+               batch_size: int = batch_size_option):
+    bulk_insert(Season, gen_seasons(count), batch_size)
+
+
+def gen_chapters(count: int) -> Iterator[dict]:
+    season_ids = load_ids(Season.id)
+
+    for i in range(count):
+        yield dict(title=get_random_string(15),
+                   season_id=random.choice(season_ids),
+                   chapter_prequel_id=None)
 
 
 @app.command()
-def persongen():
-    for i in range(10):
-        name = get_random_string(15)
-        lastname = get_random_string(15)
-        gender = gen_person_gender()
+def chaptersgen(count: int = count_option,
+                batch_size: int = batch_size_option):
+    bulk_insert(Chapter, gen_chapters(count), batch_size)
+
+
+def gen_persons(count: int) -> Iterator[dict]:
+    for i in range(count):
         date_of_birth = gen_date()
-        person_type = gen_person_type()
 
-        try:
-            new_person = Person(name=name,
-                                lastname=lastname,
-                                gender=gender,
-                                date_of_birth=date_of_birth,
-                                person_type=person_type)
+        yield dict(name=get_random_string(15),
+                   lastname=get_random_string(15),
+                   gender=gen_person_gender(),
+                   date_of_birth=date_of_birth,
+                   person_type=gen_person_type(),
+                   age=Person.get_age(date_of_birth))
 
-            session.add(new_person)
-            session.commit()
 
-            typer.echo(f'name: {name} , lastname:{lastname}'
-                       f' gender:{gender},'
-                       f'gender:{gender}, '
-                       f'date_of_birth:{date_of_birth},'
-                       f'person_type:{person_type},'
-                       f' person created!')
+@app.command()
+def persongen(count: int = count_option,
+              batch_size: int = batch_size_option):
+    bulk_insert(Person, gen_persons(count), batch_size)
 
-        except IntegrityError:
-            session.rollback()
-            typer.echo('An error has occurred during the creation '
-                       'of the person')
 
+def gen_roles(count: int) -> Iterator[dict]:
+    for i in range(count):
+        yield dict(name=get_random_string(15),
+                   description=get_random_string(15))
 
-@app.command()
-def rolesgen():
-    for i in range(10):
-        name = get_random_string(15)
-        description = get_random_string(15)
 
-        try:
-            new_role = Role(name=name,
-                            description=description)
+@app.command()
+def rolesgen(count: int = count_option,
+             batch_size: int = batch_size_option):
+    bulk_insert(Role, gen_roles(count), batch_size)
 
-            session.add(new_role)
-            session.commit()
 
-            typer.echo(f'name: {name} , description:{description}'
-                       f' role created!')
+def gen_films_persons_roles(count: int) -> Iterator[dict]:
+    film_ids = load_ids(Film.id)
+    person_ids = load_ids(Person.id)
+    role_ids = load_ids(Role.id)
 
-        except IntegrityError:
-            session.rollback()
-            typer.echo('An error has occurred during the creation '
-                       'of the roles')
+    for i in range(count):
+        yield dict(film_id=random.choice(film_ids),
+                   person_id=random.choice(person_ids),
+                   role_id=random.choice(role_ids))
 
 
 @app.command()
-def filmspersonsrolesgen():
-    for i in range(10):
-        statement = select(Film)
-        items_film = list(session.exec(statement).all())
-        film = random.choice(items_film)
+def filmspersonsrolesgen(count: int = count_option,
+                         batch_size: int = batch_size_option):
+    bulk_insert(FilmPersonRole, gen_films_persons_roles(count), batch_size)
 
-        statement = select(Person)
-        items_person = list(session.exec(statement).all())
-        person = random.choice(items_person)
 
-        statement = select(Role)
-        items_role = list(session.exec(statement).all())
-        role = random.choice(items_role)
+def gen_clients(count: int) -> Iterator[dict]:
+    # Each person can only have one client
+    statement = select(Person.id).outerjoin(
+        Client, Client.person_id == Person.id).where(
+        Client.id.is_(None)).order_by(Person.id)
+    free_person_ids = list(session.exec(statement).all())
 
-        try:
-            new_film_person_role = FilmPersonRole(film_id=film.id,
-                                                  person_id=person.id,
-                                                  role_id=role.id)
+    if count > len(free_person_ids):
+        typer.echo(f'Only {len(free_person_ids)} persons without client')
+        count = len(free_person_ids)
 
-            session.add(new_film_person_role)
-            session.commit()
+    for person_id in random.sample(free_person_ids, count):
+        yield dict(person_id=person_id,
+                   direction=get_random_string(15),
+                   phone=gen_phone(),
+                   email=f'{get_random_string(15)}@filmrentalsystem.com')
 
-            typer.echo(f'film: {film} , person:{person}'
-                       f' role:{role},'
-                       f' film-person-role created!')
 
-        except IntegrityError:
-            session.rollback()
-            typer.echo('An error has occurred during the creation '
-                       'of the films-persons-roles')
+@app.command()
+def clientsgen(count: int = count_option,
+               batch_size: int = batch_size_option):
+    bulk_insert(Client, gen_clients(count), batch_size)
+
+
+def load_films_stock() -> Tuple[array, array, array]:
+    """
+    Load with two queries the id, price by day and availability of every
+    film, so the rents can be validated and priced in memory
+
+    Return:
+        film_ids (array): Ids of the films
+        film_prices (array): Price by day of each film
+        availability (array): Stock minus the amount of open rents of each
+        film
+    """
+    statement = select(Film.id, Film.stock, Film.price_by_day).order_by(
+        Film.id)
+    films = list(session.exec(statement).all())
+
+    if not films:
+        typer.echo('There are no records in film')
+        raise typer.Exit(code=1)
+
+    statement = select(Rent.film_id, func.sum(Rent.amount)).where(
+        Rent.state == 'open').group_by(Rent.film_id)
+    rented = dict(session.exec(statement).all())
+
+    film_ids = array('q', (film_id for film_id, _, _ in films))
+    film_prices = array('d', (price for _, _, price in films))
+    availability = array('q', (stock - rented.get(film_id, 0)
+                               for film_id, stock, _ in films))
+    return film_ids, film_prices, availability
+
+
+def gen_rents(count: int) -> Iterator[dict]:
+    # Same rules as RentCreate, checked in memory instead of by queries
+    film_ids, film_prices, availability = load_films_stock()
+    client_ids = load_ids(Client.id)
+
+    start_date = date(year=2020, month=1, day=1)
+    return_date = date(year=2020, month=1, day=5)
+    state = 'open'
+    skipped = 0
+
+    for i in range(count):
+        film_index = random.randrange(len(film_ids))
+        amount = gen_number(1, 9)
+
+        if availability[film_index] < amount:
+            skipped += 1
+            continue
+        availability[film_index] -= amount
+
+        cost = RentBusinessLogic.get_rent_cost(amount, start_date,
+                                               return_date, None,
+                                               film_prices[film_index])
+
+        yield dict(film_id=film_ids[film_index],
+                   client_id=random.choice(client_ids),
+                   amount=amount,
+                   start_date=start_date,
+                   return_date=return_date,
+                   actual_return_date=None,
+                   state=state,
+                   cost=cost if cost != 'N.A' else None)
+
+    if skipped:
+        typer.echo(f'{skipped} rents skipped, the amount exceeds the '
+                   f'availability of the film')
+
+
+def rebuild_rent_aggregates():
+    """
+    Rebuild the revenue rollups and the films leaderboard, the rents are bulk
+    inserted without maintaining them. The seed doesn't fail without Redis,
+    the leaderboard can be rebuilt later
+    """
+    RevenueRollup.rebuild()
+    try:
+        FilmLeaderboard.rebuild()
+    except RedisError as error:
+        typer.echo(f'The leaderboard was not rebuilt, run '
+                   f'"leaderboardrebuild": {error}')
 
 
 @app.command()
-def clientsgen():
-    for i in range(10):
-        statement = select(Person)
-        items_person = list(session.exec(statement).all())
-        person = random.choice(items_person)
+def rentsgen(count: int = count_option,
+             batch_size: int = batch_size_option):
+    bulk_insert(Rent, gen_rents(count), batch_size)
+    rebuild_rent_aggregates()
+
+
+def gen_profile_rents(count: int, seed: int, workers: int, until: date,
+                      history_days: int, zipf_exponent: float,
+                      chunk_size: int = 10000) -> Iterator[dict]:
+    film_ids, film_prices, availability = load_films_stock()
+    client_ids = load_ids(Client.id)
+    film_indexes = {film_id: index for index, film_id in enumerate(film_ids)}
+
+    # The popularity rank of the films doesn't follow the ids
+    ranking = list(range(len(film_ids)))
+    random.Random(seed).shuffle(ranking)
+    ranked_ids = array('q', (film_ids[index] for index in ranking))
+    ranked_prices = array('d', (film_prices[index] for index in ranking))
+
+    chunks = [(index, min(chunk_size, count - start))
+              for index, start in enumerate(range(0, count, chunk_size))]
+    skipped = 0
+
+    with Pool(workers, initializer=init_rents_worker,
+              initargs=(ranked_ids, ranked_prices, client_ids, zipf_exponent,
+                        seed, until, history_days)) as pool:
+        for rents in pool.imap(gen_rents_chunk, chunks):
+            for rent in rents:
+                # Open rents can't exceed the stock of the film
+                if rent['state'] == 'open':
+                    film_index = film_indexes[rent['film_id']]
+                    if availability[film_index] < rent['amount']:
+                        skipped += 1
+                        continue
+                    availability[film_index] -= rent['amount']
+                yield rent
+
+    if skipped:
+        typer.echo(f'{skipped} open rents skipped, the amount exceeds the '
+                   f'availability of the film')
 
-        direction = get_random_string(15)
-        phone = gen_phone()
-        email = get_random_string(15)
 
-        try:
-            new_client = Client(person_id=person.id,
-                                direction=direction,
-                                phone=phone,
-                                email=f'{email}@filmrentalsystem.com')
+@app.command()
+def profilegen(profile: str = typer.Option('small',
+                                           help='Dataset profile (small / '
+                                                'medium / large)'),
+               seed: int = typer.Option(42, help='Seed of the random data'),
+               workers: int = typer.Option(os.cpu_count(),
+                                           help='Processes generating '
+                                                'the rents'),
+               until: str = typer.Option(None,
+                                         help='Date of the most recent rent '
+                                              '(today by default)'),
+               history_days: int = typer.Option(730,
+                                                help='Days of rent history'),
+               zipf_exponent: float = typer.Option(1.1,
+                                                   help='Exponent of the '
+                                                        'films popularity'),
+               batch_size: int = batch_size_option):
+    if profile not in DATASET_PROFILES:
+        typer.echo(f'profile should be one of {", ".join(DATASET_PROFILES)}')
+        raise typer.Exit(code=1)
+
+    counts = DATASET_PROFILES[profile]
+    until = date.fromisoformat(until) if until else date.today()
+    random.seed(seed)
+
+    bulk_insert(Category, gen_categories(counts['categories']), batch_size)
+    bulk_insert(Film, gen_films(counts['films']), batch_size)
+    bulk_insert(Season, gen_seasons(counts['seasons']), batch_size)
+    bulk_insert(Chapter, gen_chapters(counts['chapters']), batch_size)
+    bulk_insert(Role, gen_roles(counts['roles']), batch_size)
+    bulk_insert(Person, gen_persons(counts['persons']), batch_size)
+    bulk_insert(Client, gen_clients(counts['clients']), batch_size)
+    bulk_insert(FilmPersonRole,
+                gen_films_persons_roles(counts['films_persons_roles']),
+                batch_size)
+    bulk_insert(Rent,
+                gen_profile_rents(counts['rents'], seed, workers, until,
+                                  history_days, zipf_exponent),
+                batch_size)
+    rebuild_rent_aggregates()
 
-            session.add(new_client)
-            session.commit()
 
-            typer.echo(f'person: {person} , direction:{direction}'
-                       f' phone:{phone}, email:{email} '
-                       f' client created!')
+@app.command()
+def repricerents(film_id: int = typer.Option(...,
+                                             help='Film whose price changed'),
+                 chunk_size: int = typer.Option(10000,
+                                                help='Rents updated by '
+                                                     'transaction')):
+    start_time = time.perf_counter()
+    affected_rows = Rent.reprice_open_rents_by_film_id(film_id, chunk_size)
+    RevenueRollup.rebuild(film_id)
+    elapsed_seconds = time.perf_counter() - start_time
 
-        except IntegrityError:
-            session.rollback()
-            typer.echo('An error has occurred during the creation '
-                       'of the client')
+    typer.echo(f'{affected_rows} open rents repriced in '
+               f'{elapsed_seconds:.3f}s!')
 
 
 @app.command()
-def rentsgen():
-    for i in range(10):
-        statement = select(Film)
-        items_film = list(session.exec(statement).all())
-        film = random.choice(items_film)
+def revenuerebuild():
+    start_time = time.perf_counter()
+    rollups = RevenueRollup.rebuild()
+    elapsed_seconds = time.perf_counter() - start_time
 
-        statement = select(Client)
-        items_client = list(session.exec(statement).all())
-        client = random.choice(items_client)
+    typer.echo(f'{rollups} revenue rollups rebuilt in '
+               f'{elapsed_seconds:.3f}s!')
 
-        amount = gen_number(1, 9)
 
-        start_date = date(year=2020, month=1, day=1)
-        return_date = date(year=2020, month=1, day=5)
-        state = 'open'
+@app.command()
+def leaderboardrebuild():
+    for key, films in FilmLeaderboard.rebuild().items():
+        typer.echo(f'{key}: {films} films')
+    typer.echo('Leaderboard rebuilt!')
 
-        try:
-            new_rent_create = RentCreate(film_id=film.id,
-                                         client_id=client.id,
-                                         amount=amount,
-                                         start_date=start_date,
-                                         return_date=return_date,
-                                         actual_return_date=None,
-                                         state=state)
-
-            new_rent = Rent(film_id=film.id,
-                            client_id=client.id,
-                            amount=amount,
-                            start_date=start_date,
-                            return_date=return_date,
-                            actual_return_date=None,
-                            state=state,
-                            cost=Rent.get_cost(new_rent_create))
-
-            session.add(new_rent)
-            session.commit()
 
-            typer.echo(f'film: {film} , client:{client}'
-                       f' amount:{amount}, start_date:{start_date},'
-                       f' return_date:{return_date}, state:{state},'
-                       f' Rent created!')
+@app.command()
+def refreshages():
+    start_time = time.perf_counter()
+    affected_rows = Person.refresh_ages()
+    elapsed_seconds = time.perf_counter() - start_time
 
-        except IntegrityError:
-            session.rollback()
-            typer.echo('An error has occurred during the creation '
-                       'of the Rent')
-        except ValidationError:
-            session.rollback()
-            typer.echo('An error has occurred during the creation '
-                       'of the Rent')
+    typer.echo(f'{affected_rows} ages updated in {elapsed_seconds:.3f}s!')
+
+
+@app.command()
+def personsimport(path: str = typer.Option(..., help='CSV or NDJSON file of '
+                                                     'persons and clients'),
+                  file_format: str = typer.Option(None,
+                                                  help='csv / ndjson (by '
+                                                       'default from the '
+                                                       'extension)'),
+                  batch_size: int = typer.Option(IMPORT_BATCH_SIZE,
+                                                 help='Rows inserted by '
+                                                      'commit')):
+    file_format = file_format or PersonImport.get_file_format(path)
+    if file_format not in PersonImport.file_formats:
+        typer.echo('Unknown file format, use --file-format csv or ndjson')
+        raise typer.Exit(code=1)
+
+    with open(path, 'rb') as file:
+        for progress in PersonImport.import_rows(
+                PersonImport.read_rows(file, file_format), batch_size):
+            for error in progress.errors:
+                location = '.'.join(str(item) for item in error['loc'])
+                typer.echo(f"line {error['line']}: {location} "
+                           f"{error['msg']}")
+            typer.echo(f'processed:{progress.processed} '
+                       f'persons:{progress.persons} '
+                       f'clients:{progress.clients} '
+                       f'failed:{progress.failed}')
+
+    typer.echo('Import finished!')
+
+
+async def reconcile_posters(dry_run: bool, page_size: int,
+                            min_age_hours: int):
+    storage_service = get_storage_service()
+    modified_before = datetime.now(timezone.utc) - timedelta(
+        hours=min_age_hours)
+    total_keys = 0
+    total_orphans = 0
+
+    async for keys in storage_service.list_keys(page_size, modified_before):
+        urls = {storage_service.get_url(key): key for key in keys}
+
+        statement = select(Poster.link).where(Poster.link.in_(list(urls)))
+        linked_urls = set(session.exec(statement).all())
+        orphans = [key for url, key in urls.items()
+                   if url not in linked_urls]
+
+        if orphans and not dry_run:
+            await storage_service.delete_objects(orphans)
+
+        total_keys += len(keys)
+        total_orphans += len(orphans)
+        typer.echo(f'checked:{total_keys} orphans:{total_orphans}')
+
+    typer.echo(f'{total_orphans} orphan objects '
+               f'{"found" if dry_run else "deleted"}!')
+
+
+@app.command()
+def postersreconcile(dry_run: bool = typer.Option(False,
+                                                  help='Only report the '
+                                                       'orphan objects'),
+                     page_size: int = typer.Option(1000,
+                                                   help='Keys listed by '
+                                                        'page'),
+                     min_age_hours: int = typer.Option(24,
+                                                       help='Skip the objects '
+                                                            'uploaded recently'
+                                                       )):
+    asyncio.run(reconcile_posters(dry_run, page_size, min_age_hours))
 
 
 if __name__ == "__main__":
@@ -26,3 +26,17 @@ engine = create_engine(database_url, echo=True)
 
 def get_db_session():
     return Session(bind=engine)
+
+
+def get_job_session():
+    """
+    Return a new session for the jobs executed on background (periodic jobs,
+    imports). They can run on a thread of the executor, outside the request
+    thread, so they never share the module sessions of the routers and
+    models, which aren't thread safe
+
+    Return:
+        session (Session): Session to close when the job ends, e.g. with a
+        "with" statement
+    """
+    return Session(bind=engine)
@@ -0,0 +1,14 @@
+import os
+
+import redis
+from dotenv import load_dotenv
+
+load_dotenv()  # take environment variables from .env.
+
+
+def get_redis_client() -> redis.Redis:
+    # Short timeouts, a Redis outage can't hold the requests
+    return redis.from_url(
+        os.environ.get("REDIS_URL", "redis://localhost:6379"),
+        socket_connect_timeout=1,
+        socket_timeout=1)
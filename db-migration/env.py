@@ -8,7 +8,7 @@ from sqlalchemy import create_engine
 # necessarily to import something from file where your models are stored
 from sqlmodel import SQLModel
 
-from models import films_and_rents, persons, tokens, users
+from models import films_and_rents, persons, reports, tokens, users
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,28 @@
+"""add open rents return date index
+
+Revision ID: 3f1c2a9d8b71
+Revises: 
+Create Date: 2026-10-19 04:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel # added
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d8b71'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The tables are created by SQLModel.metadata.create_all, that also
+    # creates the index on new databases
+    op.execute("CREATE INDEX IF NOT EXISTS ix_rent_return_date_open ON rent "
+               "(return_date, id) WHERE state = 'open'")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_rent_return_date_open")
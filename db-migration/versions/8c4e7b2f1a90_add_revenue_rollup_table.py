@@ -0,0 +1,38 @@
+"""add revenue rollup table
+
+Revision ID: 8c4e7b2f1a90
+Revises: 3f1c2a9d8b71
+Create Date: 2026-10-19 05:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel # added
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e7b2f1a90'
+down_revision = '3f1c2a9d8b71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Same DDL executed by SQLModel.metadata.create_all on new databases.
+    # Fill the table with "python command.py revenuerebuild"
+    op.execute("CREATE TABLE IF NOT EXISTS revenuerollup ("
+               "day DATE NOT NULL, "
+               "film_id INTEGER NOT NULL, "
+               "category_id INTEGER NOT NULL, "
+               "rent_count INTEGER, "
+               "revenue FLOAT, "
+               "PRIMARY KEY (day, film_id), "
+               "FOREIGN KEY(film_id) REFERENCES film (id), "
+               "FOREIGN KEY(category_id) REFERENCES category (id))")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_revenuerollup_film_id ON "
+               "revenuerollup (film_id)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_revenuerollup_film_id")
+    op.execute("DROP TABLE IF EXISTS revenuerollup")
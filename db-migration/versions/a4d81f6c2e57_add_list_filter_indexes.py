@@ -0,0 +1,36 @@
+"""add list filter indexes
+
+Revision ID: a4d81f6c2e57
+Revises: e7a35b0c94d2
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel # added
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d81f6c2e57'
+down_revision = 'e7a35b0c94d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Same DDL executed by SQLModel.metadata.create_all on new databases
+    op.execute("CREATE INDEX IF NOT EXISTS ix_film_category_id_release_date "
+               "ON film (category_id, release_date, id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_film_film_type_release_date "
+               "ON film (film_type, release_date, id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_rent_state_start_date ON rent "
+               "(state, start_date, id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_person_person_type_lastname "
+               "ON person (person_type, lastname, name, id)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_person_person_type_lastname")
+    op.execute("DROP INDEX IF EXISTS ix_rent_state_start_date")
+    op.execute("DROP INDEX IF EXISTS ix_film_film_type_release_date")
+    op.execute("DROP INDEX IF EXISTS ix_film_category_id_release_date")
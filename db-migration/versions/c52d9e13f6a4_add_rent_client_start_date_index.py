@@ -0,0 +1,26 @@
+"""add rent client start date index
+
+Revision ID: c52d9e13f6a4
+Revises: 8c4e7b2f1a90
+Create Date: 2026-10-19 06:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel # added
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52d9e13f6a4'
+down_revision = '8c4e7b2f1a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE INDEX IF NOT EXISTS ix_rent_client_id_start_date ON "
+               "rent (client_id, start_date, id)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_rent_client_id_start_date")
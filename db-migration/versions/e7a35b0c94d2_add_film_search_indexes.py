@@ -0,0 +1,37 @@
+"""add film search indexes
+
+Revision ID: e7a35b0c94d2
+Revises: c52d9e13f6a4
+Create Date: 2026-10-19 07:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel # added
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a35b0c94d2'
+down_revision = 'c52d9e13f6a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Same DDL executed by models.films_and_rents on new databases
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("ALTER TABLE film ADD COLUMN IF NOT EXISTS search_vector "
+               "tsvector GENERATED ALWAYS AS ("
+               "setweight(to_tsvector('english', coalesce(title, '')), 'A') "
+               "|| setweight(to_tsvector('english', "
+               "coalesce(description, '')), 'B')) STORED")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_film_search_vector ON film "
+               "USING gin (search_vector)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_film_title_trgm ON film "
+               "USING gin (title gin_trgm_ops)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_film_title_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_film_search_vector")
+    op.execute("ALTER TABLE film DROP COLUMN IF EXISTS search_vector")
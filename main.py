@@ -2,13 +2,19 @@ from fastapi import FastAPI, Request, Response
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import SQLModel
 from starlette.responses import JSONResponse
+from starlette.staticfiles import StaticFiles
 
 from databases.db import engine, get_db_session
 
 from utilities.logger import Logger
+from utilities.periodic import PeriodicJob
 
 # Import routes
-from routers import users, security, films, persons, rents
+from routers import users, security, films, persons, rents, reports, \
+    autocomplete
+from models.autocomplete import Autocomplete
+from models.films_and_rents import Rent
+from models.persons import Person
 
 # Redis db imports
 from fastapi_redis_cache import FastApiRedisCache
@@ -27,9 +33,41 @@ app.include_router(security.router)
 app.include_router(films.router)
 app.include_router(persons.router)
 app.include_router(rents.router)
+app.include_router(reports.router)
+app.include_router(autocomplete.router)
+
+# Serve the uploaded files when the local storage backend is used
+if os.environ.get("STORAGE_BACKEND") == "Local":
+    local_storage_path = os.environ.get("LOCAL_STORAGE_PATH", "media")
+    os.makedirs(local_storage_path, exist_ok=True)
+    app.mount(os.environ.get("LOCAL_STORAGE_URL", "/media"),
+              StaticFiles(directory=local_storage_path),
+              name="media")
 
 session = get_db_session()
 
+# Hours between the recomputations of the ages of the persons (0 disables it)
+refresh_ages_job = PeriodicJob(
+    name="refresh_ages",
+    job=Person.refresh_ages,
+    interval_seconds=float(os.environ.get("AGES_REFRESH_INTERVAL_HOURS",
+                                          24)) * 3600)
+
+# Hours between the notices of the overdue rents (0 disables it)
+overdue_rents_job = PeriodicJob(
+    name="overdue_rents",
+    job=Rent.notify_overdue_rents,
+    interval_seconds=float(os.environ.get("OVERDUE_RENTS_INTERVAL_HOURS",
+                                          24)) * 3600)
+
+# Minutes between the reloads of the autocomplete indexes of the worker, the
+# first load is done at startup
+autocomplete_job = PeriodicJob(
+    name="autocomplete",
+    job=Autocomplete.load,
+    interval_seconds=float(os.environ.get(
+        "AUTOCOMPLETE_RELOAD_INTERVAL_MINUTES", 10)) * 60)
+
 # Creating databases
 SQLModel.metadata.create_all(engine)
 
@@ -75,3 +113,29 @@ def startup():
         response_header="X-API-Cache",
         ignore_arg_types=[Request, Response, session]
     )
+
+
+# Storage events---------------------------------------------------------------
+@app.on_event("startup")
+async def start_storage_deletion_queue():
+    films.deletion_queue.start()
+
+
+@app.on_event("shutdown")
+async def stop_storage_deletion_queue():
+    await films.deletion_queue.stop()
+
+
+# Batch jobs-------------------------------------------------------------------
+@app.on_event("startup")
+async def start_periodic_jobs():
+    refresh_ages_job.start()
+    overdue_rents_job.start()
+    autocomplete_job.start()
+
+
+@app.on_event("shutdown")
+async def stop_periodic_jobs():
+    await refresh_ages_job.stop()
+    await overdue_rents_job.stop()
+    await autocomplete_job.stop()
@@ -0,0 +1,88 @@
+# Autocomplete related models
+import heapq
+from itertools import islice
+from typing import Iterable, List, Tuple
+
+from sqlmodel import SQLModel, select
+
+from databases.db import get_job_session
+from models.films_and_rents import Category, Film
+from models.persons import Person
+from utilities.prefix_index import PrefixIndex
+
+
+class Autocomplete(object):
+    """
+    Prefix indexes of the film titles, person names and category names kept
+    in the memory of the worker, updated by the routes that write them and
+    reloaded periodically to get the changes made by the other workers
+    """
+    indexes = {'film': PrefixIndex(),
+               'person': PrefixIndex(),
+               'category': PrefixIndex()}
+
+    @staticmethod
+    def get_person_label(name: str, lastname: str) -> str:
+        return f'{name} {lastname}'
+
+    @classmethod
+    def load(cls) -> int:
+        """
+        Load the indexes from the database
+
+        Return:
+            items (int): Amount of indexed items
+        """
+        with get_job_session() as job_session:
+            cls.indexes['film'].load(
+                job_session.exec(select(Film.id, Film.title)))
+            cls.indexes['person'].load(
+                (person_id, cls.get_person_label(name, lastname))
+                for person_id, name, lastname in job_session.exec(
+                    select(Person.id, Person.name, Person.lastname)))
+            cls.indexes['category'].load(
+                job_session.exec(select(Category.id, Category.name)))
+
+        return sum(len(index.labels) for index in cls.indexes.values())
+
+    @classmethod
+    def add(cls, kind: str, item_id: int, label: str):
+        cls.indexes[kind].add(item_id, label)
+
+    @classmethod
+    def add_many(cls, kind: str, items: Iterable[Tuple[int, str]]):
+        cls.indexes[kind].add_many(items)
+
+    @classmethod
+    def remove(cls, kind: str, item_id: int):
+        cls.indexes[kind].remove(item_id)
+
+    @classmethod
+    def search(cls, query: str, limit: int,
+               kinds: List[str]) -> List["AutocompleteRead"]:
+        """
+        Return the first items of the kinds that match the query, in the
+        order of the matched terms
+
+        Args:
+            query (str): Text written by the user
+            limit (int): Maximum amount of items
+            kinds (List[str]): Kinds of items to search (film / person /
+            category)
+
+        Return:
+            items (List[AutocompleteRead]): Matched items
+        """
+        matches = heapq.merge(*[
+            [(term, kind, item_id, label) for term, item_id, label
+             in cls.indexes[kind].search(query, limit)]
+            for kind in kinds])
+
+        return [AutocompleteRead(kind=kind, id=item_id, label=label)
+                for _, kind, item_id, label in islice(matches, limit)]
+
+
+class AutocompleteRead(SQLModel):
+    kind: str
+    id: int
+    label: str
@@ -1,17 +1,80 @@
 from datetime import date
 from typing import Optional, List
 
-from sqlmodel import SQLModel, Field, Relationship, select
+from sqlalchemy.orm import selectinload
+from sqlmodel import SQLModel, Field, Relationship, Session, select
 
-from business_logic.business_logic import RentBusinessLogic
-from databases.db import get_db_session
+from business_logic.business_logic import FilmBusinessLogic, \
+    RentBusinessLogic
+from databases.db import get_db_session, get_job_session
 from pydantic import validator
+from utilities.logger import Logger
 from validators import validators
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, Index, DDL, case, cast, \
+    event, func, literal, literal_column, not_, text, tuple_, union_all, \
+    update
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 session = get_db_session()
 
 
+def find_prequel_chain(model, prequel_column: str, item_id: int,
+                       max_depth: int) -> List[SQLModel]:
+    """
+    Return the whole chain of prequels and sequels of the item, from the first
+    one to the last one, with one statement of two recursive CTEs. The
+    prequel ids aren't foreign keys, so the visited ids are kept in a path to
+    stop on cycles
+
+    Args:
+        model: Model of the chain (Film / Season / Chapter)
+        prequel_column (str): Column with the id of the prequel of the item
+        item_id (int): Item of the chain
+        max_depth (int): Maximum amount of prequels and of sequels followed
+
+    Return:
+        chain (List[SQLModel]): Items in viewing order, empty if the item
+        doesn't exist
+    """
+    table = model.__table__
+
+    def start(name):
+        return select(
+            table.c.id, table.c[prequel_column].label('prequel_id'),
+            literal(0).label('position'),
+            (',' + cast(table.c.id, String) + ',').label('path')).where(
+            table.c.id == item_id).cte(name, recursive=True)
+
+    def step(chain, link, position):
+        item = table.alias()
+        return select(
+            item.c.id, item.c[prequel_column], position,
+            chain.c.path + cast(item.c.id, String) + ',').where(
+            link(item, chain), func.abs(chain.c.position) < max_depth,
+            not_(chain.c.path.contains(
+                ',' + cast(item.c.id, String) + ',')))
+
+    prequels = start('prequels')
+    prequels = prequels.union_all(step(
+        prequels, lambda item, chain: item.c.id == chain.c.prequel_id,
+        prequels.c.position - 1))
+    sequels = start('sequels')
+    sequels = sequels.union_all(step(
+        sequels, lambda item, chain: item.c[prequel_column] == chain.c.id,
+        sequels.c.position + 1))
+
+    # On a cycle both directions go around it, keep the first position
+    positions = union_all(select(prequels.c.id, prequels.c.position),
+                          select(sequels.c.id, sequels.c.position)).subquery()
+    chain = select(positions.c.id,
+                   func.min(positions.c.position).label('position')).group_by(
+        positions.c.id).subquery()
+    statement = select(model).join(chain, chain.c.id == model.id).order_by(
+        chain.c.position)
+
+    return session.exec(statement).all()
+
+
 # Film related models
 class CategoryBase(SQLModel):
     name: str = Field(sa_column=Column("name", String, unique=True))
@@ -46,10 +109,19 @@ class FilmBase(SQLModel):
 
 
 class Film(FilmBase, table=True):
+    # Filters of the film list sorted by release date
+    __table_args__ = (
+        Index('ix_film_category_id_release_date', 'category_id',
+              'release_date', 'id'),
+        Index('ix_film_film_type_release_date', 'film_type', 'release_date',
+              'id'),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     availability: Optional[int]
 
     rent: "Rent" = Relationship(back_populates="film")
+    seasons: List["Season"] = Relationship(back_populates="film")
 
     @staticmethod
     def get_availability(film_id):
@@ -57,6 +129,104 @@ class Film(FilmBase, table=True):
         film = session.exec(statement).first()
         return film.stock - Rent.get_total_amount_by_film_id(film.id)
 
+    @staticmethod
+    def get_availability_expression():
+        """
+        SQL expression of get_availability over the columns of the film,
+        computed in the same query that reads the films
+
+        Return:
+            availability: SQL expression of the availability
+        """
+        rented = select(func.coalesce(func.sum(Rent.amount), 0)).where(
+            Rent.film_id == Film.id, Rent.state == 'open').scalar_subquery()
+        return Film.stock - rented
+
+    @staticmethod
+    def get_tree(film_id: int) -> Optional["FilmTreeRead"]:
+        """
+        Return the film with its seasons and their chapters in viewing order,
+        loaded with one query by level whatever the amount of seasons and
+        chapters
+
+        Args:
+            film_id (int): Film of the tree
+
+        Return:
+            tree (FilmTreeRead): Film with the seasons and chapters nested,
+            None if the film doesn't exist
+        """
+        statement = select(Film).where(Film.id == film_id).options(
+            selectinload(Film.seasons).selectinload(Season.chapters))
+        film = session.exec(statement).first()
+        if film is None:
+            return None
+
+        def in_viewing_order(items, prequel_column):
+            items = {item.id: item for item in items}
+            order = FilmBusinessLogic.get_viewing_order(
+                {item_id: getattr(item, prequel_column)
+                 for item_id, item in items.items()})
+            return [items[item_id] for item_id in order]
+
+        return FilmTreeRead(**film.dict(), seasons=[
+            SeasonTreeRead(**season.dict(), chapters=[
+                ChapterRead(**chapter.dict()) for chapter in in_viewing_order(
+                    season.chapters, 'chapter_prequel_id')])
+            for season in in_viewing_order(film.seasons,
+                                           'season_prequel_id')])
+
+    @staticmethod
+    def search(query: str, limit: int, offset: int) -> List["FilmSearchRead"]:
+        """
+        Search the films by the words of their title and description, ranked
+        by relevance. When no film has the words, the films whose title is
+        similar to the query are returned, so the typos still find the film
+
+        Args:
+            query (str): Search text, supports "quoted phrases", or and -word
+            limit (int): Maximum amount of films of the page
+            offset (int): Amount of films to skip
+
+        Return:
+            films (List[FilmSearchRead]): Films with their rank
+        """
+        ts_query = func.websearch_to_tsquery(FILM_SEARCH_CONFIG, query)
+        matches = film_search_vector.op('@@')(ts_query)
+
+        statement = select(Film.id).where(matches).limit(1)
+        if session.exec(statement).first() is not None:
+            rank = func.ts_rank(film_search_vector, ts_query)
+            statement = select(Film, rank).where(matches)
+        else:
+            rank = func.word_similarity(query, Film.title)
+            statement = select(Film, rank).where(
+                literal(query).op('<%')(Film.title))
+
+        statement = statement.order_by(rank.desc(), Film.id).limit(
+            limit).offset(offset)
+        return [FilmSearchRead(**film.dict(), rank=rank)
+                for film, rank in session.exec(statement)]
+
+
+# Full text search of the films (PostgreSQL only). The vector isn't a field of
+# the model, so it's never loaded with the films
+FILM_SEARCH_CONFIG = 'english'
+film_search_vector = literal_column('film.search_vector', TSVECTOR)
+
+for film_search_ddl in (
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "ALTER TABLE film ADD COLUMN search_vector tsvector GENERATED ALWAYS "
+        f"AS (setweight(to_tsvector('{FILM_SEARCH_CONFIG}', "
+        "coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{FILM_SEARCH_CONFIG}', "
+        "coalesce(description, '')), 'B')) STORED",
+        "CREATE INDEX ix_film_search_vector ON film USING gin (search_vector)",
+        "CREATE INDEX ix_film_title_trgm ON film USING gin "
+        "(title gin_trgm_ops)"):
+    event.listen(Film.__table__, 'after_create',
+                 DDL(film_search_ddl).execute_if(dialect='postgresql'))
+
 
 class FilmCreate(FilmBase):
     @validator('release_date')
@@ -81,6 +251,10 @@ class FilmRead(FilmBase):
     availability: Optional[int]
 
 
+class FilmSearchRead(FilmRead):
+    rank: float
+
+
 class PosterBase(SQLModel):
     film_id: int = Field(foreign_key="film.id")
 
@@ -99,6 +273,17 @@ class PosterRead(PosterBase):
     link: str
 
 
+class PosterUploadRead(SQLModel):
+    key: str
+    upload_url: str
+    content_type: str
+    expires_in: int
+
+
+class PosterConfirm(SQLModel):
+    key: str
+
+
 class SeasonBase(SQLModel):
     film_id: int = Field(foreign_key="film.id")
     title: str = Field(sa_column=Column("title", String, unique=True))
@@ -111,6 +296,9 @@ class SeasonBase(SQLModel):
 class Season(SeasonBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
 
+    film: Film = Relationship(back_populates="seasons")
+    chapters: List["Chapter"] = Relationship(back_populates="season")
+
 
 class SeasonCreate(SeasonBase):
     pass
@@ -132,6 +320,8 @@ class ChapterBase(SQLModel):
 class Chapter(ChapterBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
 
+    season: Season = Relationship(back_populates="chapters")
+
 
 class ChapterCreate(ChapterBase):
     pass
@@ -141,6 +331,14 @@ class ChapterRead(ChapterBase):
     id: int
 
 
+class SeasonTreeRead(SeasonRead):
+    chapters: List[ChapterRead] = []
+
+
+class FilmTreeRead(FilmRead):
+    seasons: List[SeasonTreeRead] = []
+
+
 class RentBase(SQLModel):
     film_id: int = Field(foreign_key="film.id")
     client_id: int = Field(foreign_key="client.id")
@@ -153,6 +351,18 @@ class RentBase(SQLModel):
 
 # Rent related model
 class Rent(RentBase, table=True):
+    # Partial index of the open rents, keeps the overdue scan small
+    __table_args__ = (
+        Index('ix_rent_return_date_open', 'return_date', 'id',
+              postgresql_where=text("state = 'open'"),
+              sqlite_where=text("state = 'open'")),
+        # Rent history of a client, newest first
+        Index('ix_rent_client_id_start_date', 'client_id', 'start_date',
+              'id'),
+        # Rent list filtered by state and start date range
+        Index('ix_rent_state_start_date', 'state', 'start_date', 'id'),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     cost: Optional[float]
 
@@ -181,6 +391,174 @@ class Rent(RentBase, table=True):
                                                rent.actual_return_date,
                                                film.price_by_day)
 
+    @staticmethod
+    def get_cost_expression(price_by_day):
+        """
+        SQL expression of RentBusinessLogic.get_rent_cost over the columns of
+        the rent, NULL where the cost is not applicable (N.A)
+
+        Args:
+            price_by_day: The price by day of renting the film, a value or a
+            column
+
+        Return:
+            cost: SQL expression of the cost
+        """
+        amount_days_normal_cost = Rent.return_date - Rent.start_date
+        amount_days_actual_cost = Rent.actual_return_date - Rent.start_date
+        extra_days = amount_days_actual_cost - amount_days_normal_cost
+
+        theoretical_cost = Rent.amount * amount_days_normal_cost * price_by_day
+        cost = case(
+            (Rent.actual_return_date.is_(None), theoretical_cost),
+            # Deliver before or on return_date
+            (Rent.actual_return_date <= Rent.return_date,
+             Rent.amount * amount_days_actual_cost * price_by_day),
+            else_=theoretical_cost + extra_days * (
+                Rent.amount * price_by_day + extra_days + 1))
+
+        return case((cost > 0, cost), else_=None)
+
+    @classmethod
+    def reprice_open_rents_by_film_id(cls, film_id: int,
+                                      chunk_size: int) -> int:
+        """
+        Recompute the cost of the open rents of the film with the current
+        price by day. Each chunk of rents is updated by a single set-based
+        UPDATE and committed on its own transaction
+
+        Args:
+            film_id (int): Film of the rents
+            chunk_size (int): Amount of rents updated by transaction
+
+        Return:
+            affected_rows (int): Amount of repriced rents
+        """
+        statement = select(Film.price_by_day).where(Film.id == film_id)
+        price_by_day = session.exec(statement).one()
+
+        affected_rows = 0
+        last_id = 0
+        while True:
+            chunk = select(Rent.id).where(
+                Rent.film_id == film_id, Rent.state == 'open',
+                Rent.id > last_id).order_by(Rent.id).limit(chunk_size)
+            statement = update(Rent).where(Rent.id.in_(chunk)).values(
+                cost=cls.get_cost_expression(price_by_day)).returning(
+                Rent.id).execution_options(synchronize_session=False)
+
+            ids = session.execute(statement).scalars().all()
+            session.commit()
+            if not ids:
+                return affected_rows
+
+            affected_rows += len(ids)
+            last_id = max(ids)
+
+    @staticmethod
+    def find_overdue_rents(today: date, limit: int,
+                           after_return_date: date = None,
+                           after_id: int = None,
+                           db_session: Session = None
+                           ) -> List["RentOverdueRead"]:
+        """
+        Return a page of the open rents whose return date has passed, ordered
+        by return date and id, with the penalty they have as of today
+
+        Args:
+            today (date): Date used to compute the extra days
+            limit (int): Maximum amount of rents of the page
+            after_return_date (date): Return date of the last rent of the
+            previous page
+            after_id (int): Id of the last rent of the previous page
+            db_session (Session): Session to use (the module one by default)
+
+        Return:
+            rents (List[RentOverdueRead]): Overdue rents with their penalty
+        """
+        db_session = db_session or session
+        statement = select(Rent, Film.price_by_day).join(Film).where(
+            Rent.state == 'open', Rent.return_date < today)
+        if after_return_date is not None and after_id is not None:
+            statement = statement.where(
+                tuple_(Rent.return_date, Rent.id) > tuple_(after_return_date,
+                                                           after_id))
+        statement = statement.order_by(Rent.return_date, Rent.id).limit(
+            limit)
+        rows = db_session.exec(statement).all()
+
+        extra_days = [(today - rent.return_date).days for rent, _ in rows]
+        penalties = RentBusinessLogic.get_extra_costs(
+            [rent.amount for rent, _ in rows], extra_days,
+            [price_by_day for _, price_by_day in rows])
+
+        return [RentOverdueRead(**rent.dict(), extra_days=days,
+                                penalty=penalty)
+                for (rent, _), days, penalty in zip(rows, extra_days,
+                                                    penalties.tolist())]
+
+    @staticmethod
+    def find_rents_by_client_id(client_id: int, limit: int,
+                                before_start_date: date = None,
+                                before_id: int = None
+                                ) -> List["RentHistoryRead"]:
+        """
+        Return a page of the rents of the client with the title of their
+        film, ordered from the newest start date to the oldest
+
+        Args:
+            client_id (int): Client of the rents
+            limit (int): Maximum amount of rents of the page
+            before_start_date (date): Start date of the last rent of the
+            previous page
+            before_id (int): Id of the last rent of the previous page
+
+        Return:
+            rents (List[RentHistoryRead]): Rents of the client
+        """
+        statement = select(Rent, Film.title).join(Film).where(
+            Rent.client_id == client_id)
+        if before_start_date is not None and before_id is not None:
+            statement = statement.where(
+                tuple_(Rent.start_date, Rent.id) < tuple_(before_start_date,
+                                                          before_id))
+        statement = statement.order_by(Rent.start_date.desc(),
+                                       Rent.id.desc()).limit(limit)
+
+        return [RentHistoryRead(**rent.dict(), film_title=film_title)
+                for rent, film_title in session.exec(statement)]
+
+    @classmethod
+    def notify_overdue_rents(cls, page_size: int = 1000) -> int:
+        """
+        Stream the overdue rents page by page and log a notice with the
+        penalty of each one
+
+        Args:
+            page_size (int): Amount of rents loaded by page
+
+        Return:
+            overdue_rents (int): Amount of overdue rents
+        """
+        today = date.today()
+        overdue_rents = 0
+        after_return_date = after_id = None
+
+        with get_job_session() as job_session:
+            while True:
+                rents = cls.find_overdue_rents(today, page_size,
+                                               after_return_date, after_id,
+                                               job_session)
+                for rent in rents:
+                    Logger.warning(f"Overdue rent {rent.id} of client "
+                                   f"{rent.client_id}: {rent.extra_days} "
+                                   f"days, penalty {rent.penalty}")
+                overdue_rents += len(rents)
+                if len(rents) < page_size:
+                    return overdue_rents
+                after_return_date, after_id = rents[-1].return_date, \
+                    rents[-1].id
+
 
 class RentCreate(RentBase):
     @validator('amount')
@@ -212,3 +590,18 @@ class RentCreate(RentBase):
 class RentRead(RentBase):
     id: int
     cost: Optional[float]
+
+
+class RentOverdueRead(RentRead):
+    extra_days: int
+    penalty: float
+
+
+class RentHistoryRead(RentRead):
+    film_title: str
+
+
+class RentRepriceRead(SQLModel):
+    film_id: int
+    affected_rows: int
+    elapsed_seconds: float
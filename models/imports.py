@@ -0,0 +1,321 @@
+# Import related models
+import csv
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError, root_validator, validator
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
+from sqlmodel import SQLModel
+
+from databases.db import get_job_session
+from models.autocomplete import Autocomplete
+from models.persons import Client, Person, PersonCreate
+from utilities.logger import Logger
+from validators import validators
+
+CLIENT_FIELDS = ('direction', 'phone', 'email')
+# Rows validated and inserted by commit
+IMPORT_BATCH_SIZE = 5000
+
+
+class PersonImportRow(PersonCreate):
+    """
+    Row of an import file: a person and, when the client fields are given,
+    its client. The persons are clients unless the row says otherwise
+    """
+    person_type: str = 'client'
+    direction: Optional[str]
+    phone: Optional[str]
+    email: Optional[str]
+
+    @validator('email')
+    def validate_email(cls, v):
+        return validators.validate_email(v) if v is not None else v
+
+    @validator('phone')
+    def validate_phone(cls, v):
+        return validators.validate_phone(v) if v is not None else v
+
+    @root_validator(skip_on_failure=True)
+    def validate_client(cls, values):
+        given = [field for field in CLIENT_FIELDS
+                 if values.get(field) is not None]
+        if given:
+            if len(given) < len(CLIENT_FIELDS):
+                missing = ', '.join(field for field in CLIENT_FIELDS
+                                    if field not in given)
+                raise ValueError(f'client fields missing: {missing}')
+            validators.validate_person_type_client(values['person_type'])
+        return values
+
+    def has_client(self) -> bool:
+        return self.email is not None
+
+
+class ImportProgress(SQLModel):
+    processed: int = 0
+    persons: int = 0
+    clients: int = 0
+    failed: int = 0
+    # Errors of the last batch, so they are never accumulated
+    errors: List[Dict[str, Any]] = []
+
+
+class PersonImport(object):
+    """
+    Import of persons and clients from CSV or NDJSON files read as a stream,
+    only one batch of rows is kept in memory
+    """
+    file_formats = ('csv', 'ndjson')
+
+    @staticmethod
+    def get_file_format(filename: str) -> Optional[str]:
+        """
+        Return the format of the file by its extension
+
+        Args:
+            filename (str): Name of the file
+
+        Return:
+            file_format (str): csv / ndjson, None if it's unknown
+        """
+        extension = filename.rsplit('.', 1)[-1].lower()
+        if extension == 'csv':
+            return 'csv'
+        if extension in ('ndjson', 'jsonl'):
+            return 'ndjson'
+        return None
+
+    @staticmethod
+    def decode_lines(lines: Iterable[bytes],
+                     invalid_lines: List[Tuple[int, Exception]]
+                     ) -> Iterator[str]:
+        """
+        Decode the lines as UTF-8 (the first one can start with a BOM). A
+        line that isn't valid UTF-8 is added to invalid_lines and read as an
+        empty line, so the numbers of the next lines are kept
+
+        Args:
+            lines (Iterable[bytes]): Lines of the file
+            invalid_lines (List[Tuple[int, Exception]]): Number and error of
+            the lines that can't be decoded
+
+        Return:
+            lines (Iterator[str]): Decoded lines
+        """
+        for line, data in enumerate(lines, start=1):
+            try:
+                yield data.decode('utf-8-sig' if line == 1 else 'utf-8')
+            except UnicodeDecodeError as error:
+                invalid_lines.append((line, ValueError(
+                    f'invalid UTF-8 text at byte {error.start}')))
+                yield '\n'
+
+    @classmethod
+    def read_rows(cls, lines: Iterable[bytes],
+                  file_format: str) -> Iterator[Tuple[int, Any]]:
+        """
+        Iterate over the rows of the file, a CSV with a header or one JSON
+        object by line. Empty values are read as missing
+
+        Args:
+            lines (Iterable[bytes]): Lines of the file (e.g. a file opened in
+            binary mode), read one by one
+            file_format (str): csv / ndjson
+
+        Return:
+            rows (Iterator[Tuple[int, Any]]): Line and content of each row,
+            the content is an exception if the row can't be decoded or
+            parsed
+        """
+        invalid_lines = []
+        lines = cls.decode_lines(lines, invalid_lines)
+
+        if file_format == 'csv':
+            reader = csv.DictReader(lines)
+            for row in reader:
+                yield from invalid_lines
+                invalid_lines.clear()
+                yield reader.line_num, {
+                    field: value.strip() for field, value in row.items()
+                    if field and isinstance(value, str) and value.strip()}
+            yield from invalid_lines
+            return
+
+        for line, text in enumerate(lines, start=1):
+            if invalid_lines:
+                yield from invalid_lines
+                invalid_lines.clear()
+                continue
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError as error:
+                yield line, error
+                continue
+            if not isinstance(row, dict):
+                row = ValueError('the line is not a JSON object')
+            yield line, row
+
+    @staticmethod
+    def validate_row(line: int, row: Any, errors: List[Dict[str, Any]]
+                     ) -> Optional[PersonImportRow]:
+        if isinstance(row, Exception):
+            errors.append({'line': line, 'loc': [], 'msg': str(row),
+                           'type': 'value_error.format'})
+            return None
+        try:
+            return PersonImportRow.parse_obj(row)
+        except ValidationError as error:
+            errors.extend({'line': line, 'loc': list(row_error['loc']),
+                           'msg': row_error['msg'],
+                           'type': row_error['type']}
+                          for row_error in error.errors())
+            return None
+
+    @staticmethod
+    def reserve_ids(db_session, table, count: int) -> List[int]:
+        """
+        Take count ids of the sequence of the table, so the rows can be
+        referenced before they are inserted
+
+        Args:
+            db_session (Session): Session of the import
+            table: Table of the ids
+            count (int): Amount of ids
+
+        Return:
+            ids (List[int]): Reserved ids
+        """
+        sequence = func.pg_get_serial_sequence(table.name, 'id')
+        statement = select(func.nextval(sequence)).select_from(
+            func.generate_series(1, count))
+        return list(db_session.execute(statement).scalars())
+
+    @classmethod
+    def insert_batch(cls, db_session,
+                     rows: List[PersonImportRow]) -> Tuple[List[int], int]:
+        """
+        Insert the persons and clients of the rows with one executemany by
+        table and commit them
+
+        Args:
+            db_session (Session): Session of the import
+            rows (List[PersonImportRow]): Validated rows
+
+        Return:
+            person_ids (List[int]): Ids of the persons of each row
+            clients (int): Amount of inserted clients
+        """
+        person_ids = cls.reserve_ids(db_session, Person.__table__, len(rows))
+        persons = [dict(row.dict(include=set(PersonCreate.__fields__)),
+                        id=person_id, age=Person.get_age(row.date_of_birth))
+                   for person_id, row in zip(person_ids, rows)]
+        clients = [dict(row.dict(include=set(CLIENT_FIELDS)),
+                        person_id=person_id)
+                   for person_id, row in zip(person_ids, rows)
+                   if row.has_client()]
+
+        db_session.execute(insert(Person.__table__), persons)
+        if clients:
+            db_session.execute(insert(Client.__table__), clients)
+        db_session.commit()
+        return person_ids, len(clients)
+
+    @classmethod
+    def insert_row_by_row(cls, db_session,
+                          rows: List[Tuple[int, PersonImportRow]],
+                          errors: List[Dict[str, Any]]
+                          ) -> Tuple[List[Tuple[int, PersonImportRow]], int]:
+        """
+        Insert the rows of a batch that broke a constraint one by one, so
+        only the rows that break it are rejected
+
+        Args:
+            db_session (Session): Session of the import
+            rows (List[Tuple[int, PersonImportRow]]): Line and validated row
+            errors (List[Dict[str, Any]]): Errors of the batch
+
+        Return:
+            persons (List[Tuple[int, PersonImportRow]]): Id of the person
+            and row of the inserted rows
+            clients (int): Amount of inserted clients
+        """
+        persons = []
+        clients = 0
+        for line, row in rows:
+            try:
+                person_ids, row_clients = cls.insert_batch(db_session, [row])
+            except (IntegrityError, DataError) as error:
+                db_session.rollback()
+                errors.append({'line': line, 'loc': [],
+                               'msg': str(error.orig).splitlines()[0],
+                               'type': 'database_error'})
+                continue
+            persons.append((person_ids[0], row))
+            clients += row_clients
+        return persons, clients
+
+    @classmethod
+    def import_rows(cls, rows: Iterator[Tuple[int, Any]], batch_size: int
+                    ) -> Iterator[ImportProgress]:
+        """
+        Validate and insert the rows batch by batch, a batch is committed
+        with its valid rows and the invalid ones are reported. A batch that
+        breaks a constraint is inserted row by row
+
+        Args:
+            rows (Iterator[Tuple[int, Any]]): Rows of read_rows
+            batch_size (int): Amount of rows by batch
+
+        Return:
+            progress (Iterator[ImportProgress]): Totals after each batch and
+            the errors of the batch
+        """
+        progress = ImportProgress()
+        with get_job_session() as import_session:
+            while batch := list(islice(rows, batch_size)):
+                errors = []
+                valid_rows = [(line, row) for line, row in (
+                    (line, cls.validate_row(line, content, errors))
+                    for line, content in batch) if row is not None]
+
+                progress.processed += len(batch)
+                progress.failed += len(batch) - len(valid_rows)
+                if not valid_rows:
+                    progress.errors = errors
+                    yield progress.copy()
+                    continue
+
+                persons = []
+                clients = 0
+                try:
+                    person_ids, clients = cls.insert_batch(
+                        import_session, [row for _, row in valid_rows])
+                    persons = list(zip(person_ids,
+                                       (row for _, row in valid_rows)))
+                except (IntegrityError, DataError):
+                    import_session.rollback()
+                    persons, clients = cls.insert_row_by_row(
+                        import_session, valid_rows, errors)
+                except SQLAlchemyError as error:
+                    import_session.rollback()
+                    Logger.error(f"Import batch failed: {error}")
+                    errors.append({'line': batch[0][0], 'loc': [],
+                                   'msg': f'batch of lines {batch[0][0]}'
+                                          f'-{batch[-1][0]} not inserted',
+                                   'type': 'database_error'})
+
+                progress.persons += len(persons)
+                progress.clients += clients
+                progress.failed += len(valid_rows) - len(persons)
+                Autocomplete.add_many('person', (
+                    (person_id, Autocomplete.get_person_label(row.name,
+                                                              row.lastname))
+                    for person_id, row in persons))
+
+                progress.errors = errors
+                yield progress.copy()
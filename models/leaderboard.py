@@ -0,0 +1,142 @@
+# Leaderboard related models
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy import func
+from sqlmodel import SQLModel, select
+
+from databases.db import get_db_session
+from databases.redis_db import get_redis_client
+from models.films_and_rents import Film, Rent
+from utilities.logger import Logger
+
+session = get_db_session()
+redis_client = get_redis_client()
+
+
+class FilmLeaderboard(object):
+    """
+    Amount of rents of each film in the current week and month, kept on
+    Redis sorted sets (one by period) that are updated when the rents are
+    written. The sets expire one day after the end of their period
+    """
+    key_prefix = 'leaderboard:films'
+    periods = ('week', 'month')
+
+    @staticmethod
+    def get_period_bounds(period: str, day: date) -> Tuple[date, date]:
+        """
+        Return the first day of the period of the day and the first day of
+        the next period
+
+        Args:
+            period (str): week / month
+            day (date): Day inside the period
+
+        Return:
+            bounds (Tuple[date, date]): Start and end of the period
+        """
+        if period == 'week':
+            start = day - timedelta(days=day.weekday())
+            return start, start + timedelta(days=7)
+
+        start = day.replace(day=1)
+        return start, (start + timedelta(days=31)).replace(day=1)
+
+    @classmethod
+    def get_key(cls, period: str, day: date) -> str:
+        start, _ = cls.get_period_bounds(period, day)
+        return f'{cls.key_prefix}:{period}:{start.isoformat()}'
+
+    @classmethod
+    def get_expire_at(cls, period: str, day: date) -> datetime:
+        _, end = cls.get_period_bounds(period, day)
+        return datetime.combine(end + timedelta(days=1), time())
+
+    @classmethod
+    def add_rent(cls, film_id: int, start_date: date, rent_count: int):
+        """
+        Add a rent (or remove it with a negative count) to the leaderboards
+        of the week and month of its start date. Redis errors are logged and
+        the leaderboard can be fixed with the "leaderboardrebuild" command
+
+        Args:
+            film_id (int): Film of the rent
+            start_date (date): Start date of the rent
+            rent_count (int): 1 to add the rent, -1 to remove it
+        """
+        try:
+            pipeline = redis_client.pipeline(transaction=False)
+            for period in cls.periods:
+                key = cls.get_key(period, start_date)
+                pipeline.zincrby(key, rent_count, film_id)
+                pipeline.zremrangebyscore(key, '-inf', 0)
+                pipeline.expireat(key, cls.get_expire_at(period, start_date))
+            pipeline.execute()
+        except RedisError as error:
+            Logger.error(f"Failed to update the films leaderboard: {error}")
+
+    @classmethod
+    def get_top_films(cls, period: str, limit: int) -> List["TopFilmRead"]:
+        """
+        Return the most rented films of the current period
+
+        Args:
+            period (str): week / month
+            limit (int): Amount of films
+
+        Raises:
+            RedisError: The leaderboard is not available
+
+        Return:
+            films (List[TopFilmRead]): Films ordered by amount of rents
+        """
+        top = redis_client.zrevrange(cls.get_key(period, date.today()), 0,
+                                     limit - 1, withscores=True)
+        rent_counts = {int(film_id): int(score) for film_id, score in top}
+
+        statement = select(Film.id, Film.title).where(
+            Film.id.in_(rent_counts))
+        titles = dict(session.exec(statement).all())
+
+        return [TopFilmRead(film_id=film_id, title=titles[film_id],
+                            rent_count=rent_count)
+                for film_id, rent_count in rent_counts.items()
+                if film_id in titles]
+
+    @classmethod
+    def rebuild(cls) -> Dict[str, int]:
+        """
+        Recompute from the rents the leaderboards of the current periods,
+        every leaderboard is replaced atomically
+
+        Return:
+            films (Dict[str, int]): Amount of films of each leaderboard
+        """
+        day = date.today()
+        films = {}
+        for period in cls.periods:
+            start, end = cls.get_period_bounds(period, day)
+            statement = select(Rent.film_id, func.count()).where(
+                Rent.start_date >= start, Rent.start_date < end).group_by(
+                Rent.film_id)
+            rent_counts = dict(session.exec(statement).all())
+
+            key = cls.get_key(period, day)
+            pipeline = redis_client.pipeline()
+            if rent_counts:
+                pipeline.zadd(f'{key}:rebuild', rent_counts)
+                pipeline.rename(f'{key}:rebuild', key)
+                pipeline.expireat(key, cls.get_expire_at(period, day))
+            else:
+                pipeline.delete(key)
+            pipeline.execute()
+            films[key] = len(rent_counts)
+        return films
+
+
+class TopFilmRead(SQLModel):
+    film_id: int
+    title: str
+    rent_count: int
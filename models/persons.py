@@ -1,12 +1,15 @@
 # Person related models
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 
-from sqlalchemy import Column, Integer
+from sqlalchemy import Column, Integer, Date, Index, cast, func, literal, \
+    update
+from sqlalchemy.orm import selectinload
 from sqlmodel import SQLModel, Field, Relationship, select
 
 from business_logic.business_logic import PersonBusinessLogic
-from databases.db import get_db_session
+from databases.db import get_db_session, get_job_session
+from models.films_and_rents import Film, FilmRead, Poster, PosterRead
 from pydantic import validator
 from validators import validators
 
@@ -24,6 +27,12 @@ class PersonBase(SQLModel):
 
 
 class Person(PersonBase, table=True):
+    # Person list filtered by type and sorted by lastname
+    __table_args__ = (
+        Index('ix_person_person_type_lastname', 'person_type', 'lastname',
+              'name', 'id'),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     age: Optional[int]
 
@@ -31,6 +40,32 @@ class Person(PersonBase, table=True):
     def get_age(date_of_birth):
         return PersonBusinessLogic.get_age_by_birthday(date_of_birth)
 
+    @staticmethod
+    def refresh_ages(today: date = None) -> int:
+        """
+        Recompute the age of all the persons with one set-based UPDATE, only
+        the rows whose age changed are written. Same formula as
+        PersonBusinessLogic.get_age_by_birthday
+
+        Args:
+            today (date): Date used to compute the ages (today by default)
+
+        Return:
+            affected_rows (int): Amount of persons whose age changed
+        """
+        today = today or date.today()
+        age = cast(func.trunc(
+            (literal(today, Date) - Person.date_of_birth) / 365.25), Integer)
+
+        statement = update(Person).where(
+            Person.age.is_distinct_from(age)).values(
+            age=age).execution_options(synchronize_session=False)
+
+        with get_job_session() as job_session:
+            affected_rows = job_session.execute(statement).rowcount
+            job_session.commit()
+        return affected_rows
+
 
 class PersonCreate(PersonBase):
     @validator('gender')
@@ -77,6 +112,46 @@ class FilmPersonRoleBase(SQLModel):
 class FilmPersonRole(FilmPersonRoleBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
 
+    person: Person = Relationship()
+    role: Role = Relationship()
+
+    @staticmethod
+    def get_film_detail(film_id: int) -> Optional["FilmDetailRead"]:
+        """
+        Return the film with its credits and posters. The persons and roles
+        of the credits are loaded with IN queries, so the amount of queries
+        doesn't depend on the size of the cast
+
+        Args:
+            film_id (int): Film of the detail
+
+        Return:
+            detail (FilmDetailRead): Film with its credits and posters, None
+            if the film doesn't exist
+        """
+        film = session.exec(select(Film).where(Film.id == film_id)).first()
+        if film is None:
+            return None
+
+        statement = select(FilmPersonRole).where(
+            FilmPersonRole.film_id == film_id).options(
+            selectinload(FilmPersonRole.person),
+            selectinload(FilmPersonRole.role)).order_by(FilmPersonRole.id)
+        credits = session.exec(statement).all()
+
+        statement = select(Poster).where(Poster.film_id == film_id).order_by(
+            Poster.id)
+        posters = session.exec(statement).all()
+
+        return FilmDetailRead(**film.dict(), credits=[
+            FilmCreditRead(person_id=credit.person_id,
+                           name=credit.person.name,
+                           lastname=credit.person.lastname,
+                           role_id=credit.role_id,
+                           role=credit.role.name)
+            for credit in credits],
+            posters=[PosterRead(**poster.dict()) for poster in posters])
+
 
 class FilmPersonRoleCreate(FilmPersonRoleBase):
     pass
@@ -86,6 +161,19 @@ class FilmPersonRoleRead(FilmPersonRoleBase):
     id: int
 
 
+class FilmCreditRead(SQLModel):
+    person_id: int
+    name: str
+    lastname: str
+    role_id: int
+    role: str
+
+
+class FilmDetailRead(FilmRead):
+    credits: List[FilmCreditRead] = []
+    posters: List[PosterRead] = []
+
+
 class ClientBase(SQLModel):
     person_id: int = Field(foreign_key="person.id",
                            sa_column=Column("person_id", Integer, unique=True))
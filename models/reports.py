@@ -0,0 +1,188 @@
+# Report related models
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, select as sa_select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import SQLModel, Field, Session, select
+
+from databases.db import get_db_session
+from models.films_and_rents import Category, Film, Rent
+
+session = get_db_session()
+
+
+class RevenueRollup(SQLModel, table=True):
+    """
+    Rents and revenue pre-aggregated by start day and film, the category of
+    the film is kept to aggregate by category without reading the rents
+    """
+    day: date = Field(primary_key=True, index=False)
+    film_id: int = Field(primary_key=True, foreign_key="film.id")
+    category_id: int = Field(foreign_key="category.id", index=False)
+    rent_count: int = Field(default=0, index=False)
+    revenue: float = Field(default=0, index=False)
+
+    @staticmethod
+    def apply_rent(db_session: Session, film_id: int, day: date,
+                   rent_count: int, revenue: Optional[float]):
+        """
+        Add a rent (or remove it with a negative count and revenue) to the
+        rollup of its day and film. The change is executed on the session
+        of the rent, so it's committed on the same transaction. The rollup
+        is removed when it has no rents left
+
+        Args:
+            db_session (Session): Session where the rent is written
+            film_id (int): Film of the rent
+            day (date): Start date of the rent
+            rent_count (int): 1 to add the rent, -1 to remove it
+            revenue (float): Cost of the rent (negative to remove it)
+        """
+        category_id = select(Film.category_id).where(
+            Film.id == film_id).scalar_subquery()
+        statement = pg_insert(RevenueRollup).values(
+            day=day, film_id=film_id, category_id=category_id,
+            rent_count=rent_count, revenue=revenue or 0)
+        statement = statement.on_conflict_do_update(
+            index_elements=[RevenueRollup.day, RevenueRollup.film_id],
+            set_={'rent_count': RevenueRollup.rent_count
+                  + statement.excluded.rent_count,
+                  'revenue': RevenueRollup.revenue
+                  + statement.excluded.revenue})
+        db_session.execute(statement)
+
+        if rent_count < 0:
+            db_session.execute(delete(RevenueRollup).where(
+                RevenueRollup.day == day, RevenueRollup.film_id == film_id,
+                RevenueRollup.rent_count <= 0))
+
+    @staticmethod
+    def remove_film(db_session: Session, film_id: int):
+        """
+        Remove the rollups of a film before it's deleted, on the session of
+        the film so they are removed on the same transaction
+
+        Args:
+            db_session (Session): Session where the film is deleted
+            film_id (int): Film of the rollups
+        """
+        db_session.execute(delete(RevenueRollup).where(
+            RevenueRollup.film_id == film_id))
+
+    @staticmethod
+    def move_film(db_session: Session, film_id: int, category_id: int):
+        """
+        Move the rollups of a film to its new category, on the session of
+        the film so they are moved on the same transaction
+
+        Args:
+            db_session (Session): Session where the film is updated
+            film_id (int): Film of the rollups
+            category_id (int): New category of the film
+        """
+        db_session.execute(update(RevenueRollup).where(
+            RevenueRollup.film_id == film_id).values(category_id=category_id))
+
+    @staticmethod
+    def rebuild(film_id: int = None) -> int:
+        """
+        Recompute the rollups from the rents with one set-based INSERT, all
+        of them or only the ones of a film
+
+        Args:
+            film_id (int): Film whose rollups are recomputed (all by default)
+
+        Return:
+            rollups (int): Amount of rollups written
+        """
+        rents = sa_select(
+            Rent.start_date, Rent.film_id, Film.category_id, func.count(),
+            func.coalesce(func.sum(Rent.cost), 0)).join(
+            Film, Film.id == Rent.film_id).group_by(
+            Rent.start_date, Rent.film_id, Film.category_id)
+        clear = delete(RevenueRollup)
+        if film_id is not None:
+            rents = rents.where(Rent.film_id == film_id)
+            clear = clear.where(RevenueRollup.film_id == film_id)
+
+        statement = insert(RevenueRollup).from_select(
+            ['day', 'film_id', 'category_id', 'rent_count', 'revenue'], rents)
+
+        session.rollback()
+        session.execute(clear)
+        rollups = session.execute(statement).rowcount
+        session.commit()
+        return rollups
+
+    @staticmethod
+    def get_revenue_by_day(start_date: date,
+                           end_date: date) -> List["RevenueByDayRead"]:
+        statement = select(
+            RevenueRollup.day, func.sum(RevenueRollup.rent_count),
+            func.sum(RevenueRollup.revenue)).where(
+            RevenueRollup.day.between(start_date, end_date)).group_by(
+            RevenueRollup.day).order_by(RevenueRollup.day)
+
+        return [RevenueByDayRead(day=day, rent_count=rent_count,
+                                 revenue=revenue)
+                for day, rent_count, revenue in session.exec(statement)]
+
+    @staticmethod
+    def get_revenue_by_category(start_date: date, end_date: date
+                                ) -> List["RevenueByCategoryRead"]:
+        rollups = select(
+            RevenueRollup.category_id,
+            func.sum(RevenueRollup.rent_count).label('rent_count'),
+            func.sum(RevenueRollup.revenue).label('revenue')).where(
+            RevenueRollup.day.between(start_date, end_date)).group_by(
+            RevenueRollup.category_id).subquery()
+        statement = select(Category.id, Category.name, rollups.c.rent_count,
+                           rollups.c.revenue).join(
+            rollups, rollups.c.category_id == Category.id).order_by(
+            rollups.c.revenue.desc())
+
+        return [RevenueByCategoryRead(category_id=category_id, name=name,
+                                      rent_count=rent_count, revenue=revenue)
+                for category_id, name, rent_count, revenue
+                in session.exec(statement)]
+
+    @staticmethod
+    def get_revenue_by_film(start_date: date, end_date: date,
+                            limit: int) -> List["RevenueByFilmRead"]:
+        rollups = select(
+            RevenueRollup.film_id,
+            func.sum(RevenueRollup.rent_count).label('rent_count'),
+            func.sum(RevenueRollup.revenue).label('revenue')).where(
+            RevenueRollup.day.between(start_date, end_date)).group_by(
+            RevenueRollup.film_id).order_by(
+            func.sum(RevenueRollup.revenue).desc()).limit(limit).subquery()
+        statement = select(Film.id, Film.title, rollups.c.rent_count,
+                           rollups.c.revenue).join(
+            rollups, rollups.c.film_id == Film.id).order_by(
+            rollups.c.revenue.desc())
+
+        return [RevenueByFilmRead(film_id=film_id, title=title,
+                                  rent_count=rent_count, revenue=revenue)
+                for film_id, title, rent_count, revenue
+                in session.exec(statement)]
+
+
+class RevenueByDayRead(SQLModel):
+    day: date
+    rent_count: int
+    revenue: float
+
+
+class RevenueByCategoryRead(SQLModel):
+    category_id: int
+    name: str
+    rent_count: int
+    revenue: float
+
+
+class RevenueByFilmRead(SQLModel):
+    film_id: int
+    title: str
+    rent_count: int
+    revenue: float
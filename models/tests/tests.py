@@ -0,0 +1,156 @@
+import unittest
+from datetime import date, datetime
+
+from models.imports import PersonImport, PersonImportRow
+from models.leaderboard import FilmLeaderboard
+
+
+class FilmLeaderboardTestCase(unittest.TestCase):
+
+    def test_get_period_bounds_week(self):
+        # Weeks start on Monday
+        self.assertEqual(FilmLeaderboard.get_period_bounds(
+            'week', date(year=2022, month=3, day=13)),
+            (date(year=2022, month=3, day=7),
+             date(year=2022, month=3, day=14)))
+        self.assertEqual(FilmLeaderboard.get_period_bounds(
+            'week', date(year=2022, month=3, day=14)),
+            (date(year=2022, month=3, day=14),
+             date(year=2022, month=3, day=21)))
+        # A week can start on a year and end on the next one
+        self.assertEqual(FilmLeaderboard.get_period_bounds(
+            'week', date(year=2021, month=12, day=31)),
+            (date(year=2021, month=12, day=27),
+             date(year=2022, month=1, day=3)))
+
+    def test_get_period_bounds_month(self):
+        self.assertEqual(FilmLeaderboard.get_period_bounds(
+            'month', date(year=2022, month=2, day=28)),
+            (date(year=2022, month=2, day=1),
+             date(year=2022, month=3, day=1)))
+        self.assertEqual(FilmLeaderboard.get_period_bounds(
+            'month', date(year=2022, month=1, day=31)),
+            (date(year=2022, month=1, day=1),
+             date(year=2022, month=2, day=1)))
+        self.assertEqual(FilmLeaderboard.get_period_bounds(
+            'month', date(year=2021, month=12, day=1)),
+            (date(year=2021, month=12, day=1),
+             date(year=2022, month=1, day=1)))
+
+    def test_get_key(self):
+        day = date(year=2022, month=3, day=13)
+        self.assertEqual(FilmLeaderboard.get_key('week', day),
+                         'leaderboard:films:week:2022-03-07')
+        self.assertEqual(FilmLeaderboard.get_key('month', day),
+                         'leaderboard:films:month:2022-03-01')
+
+    def test_get_expire_at(self):
+        # The leaderboards expire one day after the end of their period
+        day = date(year=2022, month=3, day=13)
+        self.assertEqual(FilmLeaderboard.get_expire_at('week', day),
+                         datetime(year=2022, month=3, day=15))
+        self.assertEqual(FilmLeaderboard.get_expire_at('month', day),
+                         datetime(year=2022, month=4, day=2))
+
+
+class PersonImportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.person = {'name': 'Ana', 'lastname': 'Diaz', 'gender': 'feminine',
+                       'date_of_birth': '1990-01-01'}
+        self.client = {'direction': 'Street 1', 'phone': '011-1234-5678',
+                       'email': 'ana@mail.com'}
+
+    def read_rows(self, text: bytes, file_format: str):
+        return list(PersonImport.read_rows(text.splitlines(keepends=True),
+                                           file_format))
+
+    def test_get_file_format(self):
+        self.assertEqual(PersonImport.get_file_format('persons.CSV'), 'csv')
+        self.assertEqual(PersonImport.get_file_format('p.ndjson'), 'ndjson')
+        self.assertEqual(PersonImport.get_file_format('p.jsonl'), 'ndjson')
+        self.assertIsNone(PersonImport.get_file_format('persons.xlsx'))
+
+    def test_read_rows_csv(self):
+        rows = self.read_rows('\ufeffname,lastname,email\r\n'
+                              ' Ana ,Díaz,\r\n'
+                              '\r\n'
+                              'Bob,"Lee,\nJr",b@mail.com\r\n'
+                              'Eve,Po\r\n'.encode(), 'csv')
+        # The BOM is skipped, the values are stripped, the empty values are
+        # missing and the lines are the physical lines of the file
+        self.assertEqual(rows, [
+            (2, {'name': 'Ana', 'lastname': 'Díaz'}),
+            (5, {'name': 'Bob', 'lastname': 'Lee,\nJr',
+                 'email': 'b@mail.com'}),
+            (6, {'name': 'Eve', 'lastname': 'Po'})])
+
+    def test_read_rows_ndjson(self):
+        rows = self.read_rows(b'{"name": "Ana"}\n'
+                              b'\n'
+                              b'{"name": \n'
+                              b'[1, 2]\n'
+                              b'{"name": "Bob"}', 'ndjson')
+        self.assertEqual([line for line, _ in rows], [1, 3, 4, 5])
+        self.assertEqual(rows[0][1], {'name': 'Ana'})
+        self.assertIsInstance(rows[1][1], ValueError)
+        self.assertIsInstance(rows[2][1], ValueError)
+        self.assertEqual(rows[3][1], {'name': 'Bob'})
+
+    def test_read_rows_invalid_utf8(self):
+        # The line is reported instead of replacing the invalid bytes
+        rows = self.read_rows(b'name,lastname\nAna,D\xedaz\nBob,Lee\n'
+                              b'Eve,P\xff\n', 'csv')
+        self.assertEqual([line for line, _ in rows], [2, 3, 4])
+        self.assertIsInstance(rows[0][1], ValueError)
+        self.assertEqual(rows[1][1], {'name': 'Bob', 'lastname': 'Lee'})
+        self.assertIsInstance(rows[2][1], ValueError)
+
+        rows = self.read_rows(b'{"name": "\xe9"}\n{"name": "Bob"}\n',
+                              'ndjson')
+        self.assertEqual([line for line, _ in rows], [1, 2])
+        self.assertIsInstance(rows[0][1], ValueError)
+        self.assertEqual(rows[1][1], {'name': 'Bob'})
+
+    def test_validate_row(self):
+        errors = []
+        row = PersonImport.validate_row(2, dict(self.person, **self.client),
+                                        errors)
+        self.assertIsInstance(row, PersonImportRow)
+        self.assertEqual(errors, [])
+        self.assertEqual(row.person_type, 'client')
+        self.assertTrue(row.has_client())
+
+        row = PersonImport.validate_row(
+            3, dict(self.person, person_type='film related'), errors)
+        self.assertFalse(row.has_client())
+        self.assertEqual(errors, [])
+
+    def test_validate_row_errors(self):
+        errors = []
+        self.assertIsNone(PersonImport.validate_row(
+            2, ValueError('the line is not a JSON object'), errors))
+        self.assertEqual(errors, [{'line': 2, 'loc': [],
+                                   'msg': 'the line is not a JSON object',
+                                   'type': 'value_error.format'}])
+
+        # Every error of the row is reported with its line
+        errors = []
+        self.assertIsNone(PersonImport.validate_row(
+            3, dict(self.person, gender='other', email='mail'), errors))
+        self.assertEqual([(error['line'], error['loc']) for error in errors],
+                         [(3, ['gender']), (3, ['email'])])
+
+    def test_validate_row_client_fields(self):
+        # The client fields are given all together
+        errors = []
+        self.assertIsNone(PersonImport.validate_row(
+            2, dict(self.person, email='ana@mail.com'), errors))
+        self.assertEqual(errors[0]['msg'],
+                         'client fields missing: direction, phone')
+
+        errors = []
+        self.assertIsNone(PersonImport.validate_row(
+            3, dict(self.person, person_type='film related', **self.client),
+            errors))
+        self.assertEqual(len(errors), 1)
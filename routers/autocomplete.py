@@ -0,0 +1,22 @@
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Query
+from starlette import status
+
+from models.autocomplete import Autocomplete, AutocompleteRead
+
+router = APIRouter()
+
+
+# Autocomplete Related Routes, they only read the indexes of the worker
+@router.get('/api/autocomplete', response_model=List[AutocompleteRead])
+async def autocomplete(q: str = Query(..., min_length=1, max_length=100),
+                       limit: int = Query(10, ge=1, le=50),
+                       kinds: List[str] = Query(list(Autocomplete.indexes))):
+    for kind in kinds:
+        if kind not in Autocomplete.indexes:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=f"kinds should be one of "
+                                       f"{', '.join(Autocomplete.indexes)}")
+
+    return Autocomplete.search(q, limit, kinds)
@@ -1,7 +1,11 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi_redis_cache import cache_one_month
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi_redis_cache import cache_one_hour, cache_one_month
+from fastapi_redis_cache.util import ONE_MONTH_IN_SECONDS
+from redis.exceptions import RedisError
 from sqlmodel import select
 from starlette import status
 
@@ -9,42 +13,95 @@ from databases.db import get_db_session
 from models.films_and_rents import (CategoryRead, Category, CategoryCreate,
                                     FilmRead, Film, FilmCreate, SeasonRead,
                                     Season, SeasonCreate, ChapterRead, Chapter,
-                                    ChapterCreate, Poster, PosterRead)
-from s3_events.s3_utils import S3_SERVICE
+                                    ChapterCreate, Poster, PosterRead,
+                                    PosterUploadRead, PosterConfirm, Rent,
+                                    RentRepriceRead, FilmSearchRead,
+                                    FilmTreeRead, find_prequel_chain)
+from models.autocomplete import Autocomplete
+from models.leaderboard import FilmLeaderboard, TopFilmRead
+from models.persons import FilmPersonRole, FilmDetailRead
+from models.reports import RevenueRollup
+from s3_events.deletion_queue import StorageDeletionQueue
+from s3_events.storage import get_storage_service
 from security.security import get_admin_user
 
-# S3 related imports
+# Storage related imports
 import os
-from dotenv import load_dotenv
+import mimetypes
 from fastapi.param_functions import File
 from fastapi.datastructures import UploadFile
 import datetime
+import time
 
+from utilities.bulk import BULK_CREATE_LIMIT, validate_items, check_unique, \
+    check_exists, raise_item_errors, insert_rows
+from utilities.cache import invalidate_cache, invalidate_items
 from utilities.logger import Logger
-
-load_dotenv()
+from utilities.query_utils import apply_filters, apply_sort, get_sort_regex, \
+    get_fields_regex, select_fields, get_ids_regex, parse_ids, find_by_ids
+from validators import validators
 
 router = APIRouter()
 
 session = get_db_session()
 
-# S3 service environment variables and service
-AWS_ACCESS_KEY_ID = os.environ.get("AWS_ACCESS_KEY_ID")
-AWS_SECRET_ACCESS_KEY = os.environ.get("AWS_SECRET_ACCESS_KEY")
-AWS_REGION = os.environ.get("AWS_REGION")
-S3_Bucket = os.environ.get("S3_Bucket")
-S3_Key = os.environ.get("S3_Key")
+# Storage backend (S3 / Local) defined by the environment variables
+storage_service = get_storage_service()
+# Objects of the removed posters are deleted in batches on background
+deletion_queue = StorageDeletionQueue(
+    storage_service,
+    flush_interval=float(os.environ.get("STORAGE_DELETION_INTERVAL", 5)))
+REPRICE_CHUNK_SIZE = int(os.environ.get("REPRICE_CHUNK_SIZE", 10000))
+PRESIGNED_URL_EXPIRES_IN = int(os.environ.get("PRESIGNED_URL_EXPIRES_IN",
+                                              900))
+FILM_SORT_FIELDS = ('id', 'title', 'release_date', 'price_by_day', 'stock')
+FILM_FIELDS = tuple(FilmRead.__fields__)
+
+
+def get_unique_file_name() -> str:
+    current_time = datetime.datetime.now()
+    # for realtime application you must have genertae unique name for the file
+    return str(current_time.timestamp()).replace('.', '')
+
+
+def queue_poster_deletion(link: str):
+    key = storage_service.get_key(link)
+    if key is not None:
+        deletion_queue.put(key)
 
-# Object of S3_SERVICE Class
-s3_client = S3_SERVICE(AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION)
+
+def invalidate_film_detail(film_id: int):
+    invalidate_cache(get_detail_of_a_film, film_id=film_id)
+
+
+def check_poster_key_prefix():
+    """
+    Reject the presigned uploads when the posters have no key prefix, the
+    confirmed keys are checked against it so without a prefix any object of
+    the storage could be registered as a poster
+
+    Raises:
+        HTTPException: 400 if the key prefix is empty
+    """
+    if not storage_service.key_prefix:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Presigned uploads require a key prefix "
+                                   "for the posters")
 
 
 # Film Related Routes
 @router.get('/api/categories', response_model=List[CategoryRead],
             status_code=status.HTTP_200_OK)
 @cache_one_month()
-async def get_all_categories():
+async def get_all_categories(
+        ids: Optional[str] = Query(None, regex=get_ids_regex())):
     session.rollback()
+    if ids:
+        results = find_by_ids(session, Category, CategoryRead,
+                              parse_ids(ids), get_by_id_a_category,
+                              'category_id', ONE_MONTH_IN_SECONDS)
+        return JSONResponse(content=results)
+
     statement = select(Category)
     results = session.exec(statement).all()
 
@@ -58,7 +115,7 @@ async def get_by_id_a_category(category_id: int):
     statement = select(Category).where(Category.id == category_id)
     result = session.exec(statement).first()
 
-    return result
+    return jsonable_encoder(result)
 
 
 @router.post('/api/categories', response_model=CategoryRead,
@@ -71,10 +128,35 @@ async def create_a_category(category: CategoryCreate):
     session.add(new_category)
 
     session.commit()
+    Autocomplete.add('category', new_category.id, new_category.name)
+    invalidate_cache(get_by_id_a_category, category_id=new_category.id)
 
     return new_category
 
 
+@router.post('/api/categories/bulk', response_model=List[CategoryRead],
+             status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(get_admin_user)])
+async def create_categories_in_bulk(
+        categories: List[Dict[str, Any]] = Body(
+            ..., min_items=1, max_items=BULK_CREATE_LIMIT)):
+    session.rollback()
+    new_categories, errors = validate_items(categories, CategoryCreate)
+    check_unique(session, new_categories, Category.name, 'name', errors)
+    # Nothing is created if any category is invalid
+    raise_item_errors(errors)
+
+    results = insert_rows(session, Category,
+                          [category.dict() for category in new_categories])
+    session.commit()
+    Autocomplete.add_many('category', ((category['id'], category['name'])
+                                       for category in results))
+    invalidate_items(get_by_id_a_category, 'category_id',
+                     [category['id'] for category in results])
+
+    return results
+
+
 @router.put('/api/categories/{category_id}', response_model=CategoryRead,
             dependencies=[Depends(get_admin_user)])
 async def update_a_category(category_id: int, category: CategoryCreate):
@@ -87,6 +169,8 @@ async def update_a_category(category_id: int, category: CategoryCreate):
     result.description = category.description
 
     session.commit()
+    Autocomplete.add('category', result.id, result.name)
+    invalidate_cache(get_by_id_a_category, category_id=category_id)
 
     return result
 
@@ -106,6 +190,8 @@ async def delete_a_category(category_id: int):
 
     session.delete(result)
     session.commit()
+    Autocomplete.remove('category', category_id)
+    invalidate_cache(get_by_id_a_category, category_id=category_id)
 
     return result
 
@@ -113,9 +199,43 @@ async def delete_a_category(category_id: int):
 @router.get('/api/films', response_model=List[FilmRead],
             status_code=status.HTTP_200_OK)
 @cache_one_month()
-async def get_all_films():
+async def get_all_films(
+        category_id: Optional[int] = None,
+        film_type: Optional[str] = Query(None, regex='^(movie|serie)$'),
+        release_date_from: Optional[datetime.date] = None,
+        release_date_to: Optional[datetime.date] = None,
+        sort: Optional[str] = Query(None,
+                                    regex=get_sort_regex(FILM_SORT_FIELDS)),
+        fields: Optional[str] = Query(None,
+                                      regex=get_fields_regex(FILM_FIELDS)),
+        ids: Optional[str] = Query(None, regex=get_ids_regex())):
     session.rollback()
-    statement = select(Film)
+    if ids:
+        # The availability changes with every rent, so the films are read
+        # with one IN query instead of the cache of get_by_id_a_film
+        film_ids = parse_ids(ids)
+        results = select_fields(
+            session, select(Film).where(Film.id.in_(film_ids)), Film,
+            ','.join(FILM_FIELDS),
+            expressions={'availability': Film.get_availability_expression()})
+        films = {film['id']: film for film in results}
+        return JSONResponse(content=jsonable_encoder(
+            [films[film_id] for film_id in film_ids if film_id in films]))
+
+    statement = apply_filters(
+        select(Film),
+        equals=[(Film.category_id, category_id),
+                (Film.film_type, film_type)],
+        ranges=[(Film.release_date, release_date_from, release_date_to)])
+    statement = apply_sort(statement, Film, sort)
+
+    if fields:
+        # Only the requested fields are read and sent
+        results = select_fields(
+            session, statement, Film, fields,
+            expressions={'availability': Film.get_availability_expression()})
+        return JSONResponse(content=jsonable_encoder(results))
+
     results = session.exec(statement).all()
 
     for film in results:
@@ -126,6 +246,26 @@ async def get_all_films():
     return results
 
 
+@router.get('/api/films/search', response_model=List[FilmSearchRead])
+async def search_films(q: str = Query(..., min_length=1, max_length=200),
+                       limit: int = Query(20, ge=1, le=100),
+                       offset: int = Query(0, ge=0, le=10000)):
+    session.rollback()
+    return Film.search(q, limit, offset)
+
+
+@router.get('/api/films/top', response_model=List[TopFilmRead])
+async def get_top_films(period: str = Query('week', regex='^(week|month)$'),
+                        limit: int = Query(10, ge=1, le=100)):
+    session.rollback()
+    try:
+        return FilmLeaderboard.get_top_films(period, limit)
+    except RedisError as error:
+        Logger.error(f"Films leaderboard not available: {error}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Leaderboard not available")
+
+
 @router.get('/api/films/{film_id}', response_model=FilmRead)
 @cache_one_month()
 async def get_by_id_a_film(film_id: int):
@@ -140,6 +280,46 @@ async def get_by_id_a_film(film_id: int):
     return result
 
 
+@router.get('/api/films/{film_id}/chain', response_model=List[FilmRead])
+async def get_chain_of_a_film(film_id: int,
+                              max_depth: int = Query(100, ge=1, le=1000)):
+    session.rollback()
+    results = find_prequel_chain(Film, 'film_prequel_id', film_id,
+                                 max_depth)
+
+    if not results:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Resource Not Found")
+
+    return results
+
+
+@router.get('/api/films/{film_id}/tree', response_model=FilmTreeRead)
+async def get_tree_of_a_film(film_id: int):
+    session.rollback()
+    result = Film.get_tree(film_id)
+
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Resource Not Found")
+
+    return result
+
+
+@router.get('/api/films/{film_id}/detail', response_model=FilmDetailRead)
+@cache_one_hour()
+async def get_detail_of_a_film(film_id: int):
+    session.rollback()
+    result = FilmPersonRole.get_film_detail(film_id)
+
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Resource Not Found")
+
+    # Plain JSON data, so the whole detail is cached as one payload
+    return jsonable_encoder(result)
+
+
 @router.post('/api/films', response_model=FilmRead,
              status_code=status.HTTP_201_CREATED,
              dependencies=[Depends(get_admin_user)])
@@ -158,10 +338,37 @@ async def create_a_film(film: FilmCreate):
     session.add(new_film)
 
     session.commit()
+    Autocomplete.add('film', new_film.id, new_film.title)
 
     return new_film
 
 
+@router.post('/api/films/bulk', response_model=List[FilmRead],
+             status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(get_admin_user)])
+async def create_films_in_bulk(
+        films: List[Dict[str, Any]] = Body(
+            ..., min_items=1, max_items=BULK_CREATE_LIMIT)):
+    session.rollback()
+    new_films, errors = validate_items(films, FilmCreate)
+    check_unique(session, new_films, Film.title, 'title', errors)
+    check_unique(session, new_films, Film.film_prequel_id, 'film_prequel_id',
+                 errors)
+    check_exists(session, new_films, Category.id, 'category_id', errors)
+    check_exists(session, new_films, Film.id, 'film_prequel_id', errors)
+    # Nothing is created if any film is invalid
+    raise_item_errors(errors)
+
+    results = insert_rows(session, Film,
+                          [dict(film.dict(), availability=film.stock)
+                           for film in new_films])
+    session.commit()
+    Autocomplete.add_many('film', ((film['id'], film['title'])
+                                   for film in results))
+
+    return results
+
+
 @router.put('/api/films/{film_id}', response_model=FilmRead,
             dependencies=[Depends(get_admin_user)])
 async def update_a_film(film_id: int, film: FilmCreate):
@@ -173,6 +380,7 @@ async def update_a_film(film_id: int, film: FilmCreate):
     result.title = film.title
     result.description = film.description
     result.release_date = film.release_date
+    category_changed = result.category_id != film.category_id
     result.category_id = film.category_id
     result.price_by_day = film.price_by_day
     result.stock = film.stock
@@ -180,12 +388,39 @@ async def update_a_film(film_id: int, film: FilmCreate):
     result.film_prequel_id = film.film_prequel_id
     if result:
         result.availability = Film.get_availability(film_id)
+    if category_changed:
+        RevenueRollup.move_film(session, film_id, film.category_id)
 
     session.commit()
+    Autocomplete.add('film', result.id, result.title)
+    invalidate_film_detail(film_id)
 
     return result
 
 
+@router.post('/api/films/{film_id}/reprice', response_model=RentRepriceRead,
+             dependencies=[Depends(get_admin_user)])
+async def reprice_film_rents(film_id: int):
+    session.rollback()
+    statement = select(Film).where(Film.id == film_id)
+
+    if session.exec(statement).one_or_none() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Resource Not Found")
+
+    start_time = time.perf_counter()
+    affected_rows = Rent.reprice_open_rents_by_film_id(film_id,
+                                                       REPRICE_CHUNK_SIZE)
+    RevenueRollup.rebuild(film_id)
+    elapsed_seconds = time.perf_counter() - start_time
+    Logger.info(f"Repriced {affected_rows} rents of the film {film_id} in "
+                f"{elapsed_seconds:.3f}s")
+
+    return RentRepriceRead(film_id=film_id,
+                           affected_rows=affected_rows,
+                           elapsed_seconds=elapsed_seconds)
+
+
 @router.delete('/api/films/{film_id}',
                status_code=status.HTTP_204_NO_CONTENT,
                dependencies=[Depends(get_admin_user)])
@@ -199,8 +434,20 @@ async def delete_a_film(film_id: int):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Resource Not Found")
 
+    statement = select(Poster).where(Poster.film_id == film_id)
+    posters = session.exec(statement).all()
+    links = [poster.link for poster in posters]
+
+    for poster in posters:
+        session.delete(poster)
+    RevenueRollup.remove_film(session, film_id)
     session.delete(result)
     session.commit()
+    Autocomplete.remove('film', film_id)
+    invalidate_film_detail(film_id)
+
+    for link in links:
+        queue_poster_deletion(link)
 
     return result
 
@@ -227,40 +474,113 @@ async def get_by_id_a_poster(poster_id: int):
 
 
 @router.post("/api/poster/upload/{film_id}", status_code=200,
-             description="Upload png poster asset to S3 ")
+             description="Upload png poster asset to the storage backend")
 async def upload_poster(film_id: int, fileobject: UploadFile = File(...)):
     filename = fileobject.filename
-    current_time = datetime.datetime.now()
     # split the file name into two different path (string +  extention)
     split_file_name = os.path.splitext(
         filename)
 
-    # for realtime application you must have genertae unique name for the file
-    file_name_unique = str(current_time.timestamp()).replace('.', '')
+    file_name_unique = get_unique_file_name()
 
     file_extension = split_file_name[1]  # file extention
     # Converting tempfile.SpooledTemporaryFile to io.BytesIO
     data = fileobject.file._file
-    uploads3 = await s3_client.upload_fileobj(
-        bucket=S3_Bucket,
-        key=S3_Key + file_name_unique + file_extension,
-        fileobject=data)
+    key = storage_service.build_key(file_name_unique + file_extension)
+    uploaded = await storage_service.upload_fileobj(fileobject=data, key=key)
 
-    if uploads3:
-        s3_url = f"https://" \
-                 f"{S3_Bucket}.s3.{AWS_REGION}.amazonaws.com/" \
-                 f"{S3_Key}{file_name_unique + file_extension}"
-        Logger.info(f"s3_url:{s3_url}")
+    if uploaded:
+        image_url = storage_service.get_url(key)
+        Logger.info(f"image_url:{image_url}")
 
         session.rollback()
         new_poster = Poster(film_id=film_id,
-                            link=s3_url)
+                            link=image_url)
         session.add(new_poster)
         session.commit()
+        invalidate_film_detail(film_id)
 
-        return {"status": "success", "image_url": s3_url}  # response added
+        return {"status": "success", "image_url": image_url}  # response added
     else:
-        raise HTTPException(status_code=400, detail="Failed to upload in S3")
+        raise HTTPException(status_code=400,
+                            detail="Failed to upload in the storage")
+
+
+@router.post("/api/poster/presign/{film_id}",
+             response_model=PosterUploadRead,
+             description="Generate a presigned url to upload a poster asset "
+                         "directly to the storage backend",
+             dependencies=[Depends(get_admin_user)])
+async def presign_poster_upload(film_id: int, extension: str = '.png'):
+    session.rollback()
+    statement = select(Film).where(Film.id == film_id)
+
+    if session.exec(statement).one_or_none() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Resource Not Found")
+
+    try:
+        extension = validators.validate_poster_extension(extension)
+    except AssertionError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=str(error))
+
+    if not storage_service.supports_presigned_uploads:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Presigned uploads are not supported by "
+                                   "the storage backend")
+    check_poster_key_prefix()
+
+    key = storage_service.build_key(get_unique_file_name() + extension)
+    content_type = mimetypes.types_map[extension]
+    upload_url = await storage_service.generate_presigned_upload(
+        key=key,
+        content_type=content_type,
+        expires_in=PRESIGNED_URL_EXPIRES_IN)
+
+    return PosterUploadRead(key=key,
+                            upload_url=upload_url,
+                            content_type=content_type,
+                            expires_in=PRESIGNED_URL_EXPIRES_IN)
+
+
+@router.post("/api/poster/confirm/{film_id}", response_model=PosterRead,
+             status_code=status.HTTP_201_CREATED,
+             description="Register a poster asset uploaded with a "
+                         "presigned url",
+             dependencies=[Depends(get_admin_user)])
+async def confirm_poster_upload(film_id: int, poster: PosterConfirm):
+    check_poster_key_prefix()
+    if not poster.key.startswith(storage_service.key_prefix) \
+            or '..' in poster.key.split('/'):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="The key doesn't belong to the posters")
+
+    session.rollback()
+    statement = select(Film).where(Film.id == film_id)
+
+    if session.exec(statement).one_or_none() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Resource Not Found")
+
+    if not await storage_service.object_exists(poster.key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="The poster was not found in the storage")
+
+    link = storage_service.get_url(poster.key)
+    # Confirming the same key again returns the poster already stored
+    statement = select(Poster).where(Poster.film_id == film_id,
+                                     Poster.link == link)
+    stored_poster = session.exec(statement).first()
+    if stored_poster is not None:
+        return stored_poster
+
+    new_poster = Poster(film_id=film_id, link=link)
+    session.add(new_poster)
+    session.commit()
+    invalidate_film_detail(film_id)
+
+    return new_poster
 
 
 @router.delete('/api/posters/{poster_id}',
@@ -276,8 +596,12 @@ async def delete_a_poster(poster_id: int):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Resource Not Found")
 
+    link = result.link
     session.delete(result)
     session.commit()
+    invalidate_film_detail(result.film_id)
+
+    queue_poster_deletion(link)
 
     return result
 
@@ -303,6 +627,21 @@ async def get_by_a_season(season_id: int):
     return result
 
 
+@router.get('/api/seasons/{season_id}/chain',
+            response_model=List[SeasonRead])
+async def get_chain_of_a_season(season_id: int,
+                                max_depth: int = Query(100, ge=1, le=1000)):
+    session.rollback()
+    results = find_prequel_chain(Season, 'season_prequel_id', season_id,
+                                 max_depth)
+
+    if not results:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Resource Not Found")
+
+    return results
+
+
 @router.post('/api/seasons', response_model=SeasonRead,
              status_code=status.HTTP_201_CREATED,
              dependencies=[Depends(get_admin_user)])
@@ -375,6 +714,21 @@ async def get_by_id_a_chapter(chapter_id: int):
     return result
 
 
+@router.get('/api/chapters/{chapter_id}/chain',
+            response_model=List[ChapterRead])
+async def get_chain_of_a_chapter(chapter_id: int,
+                                 max_depth: int = Query(100, ge=1, le=1000)):
+    session.rollback()
+    results = find_prequel_chain(Chapter, 'chapter_prequel_id',
+                                 chapter_id, max_depth)
+
+    if not results:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Resource Not Found")
+
+    return results
+
+
 @router.post('/api/chapters', response_model=ChapterRead,
              status_code=status.HTTP_201_CREATED,
              dependencies=[Depends(get_admin_user)])
@@ -1,41 +1,94 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi_redis_cache import cache_one_month
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, \
+    UploadFile
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi_redis_cache import cache_one_day, cache_one_month
+from fastapi_redis_cache.util import ONE_DAY_IN_SECONDS, ONE_MONTH_IN_SECONDS
 from sqlmodel import select
 from starlette import status
 
 from databases.db import get_db_session
+from models.autocomplete import Autocomplete
+from models.films_and_rents import Rent, RentHistoryRead
+from models.imports import IMPORT_BATCH_SIZE, PersonImport
 from models.persons import PersonRead, Person, PersonCreate, RoleRead, Role, \
     RoleCreate, FilmPersonRoleRead, FilmPersonRole, FilmPersonRoleCreate, \
     ClientRead, Client, ClientCreate
-from security.security import get_admin_user
+from routers.films import invalidate_film_detail
+from security.security import get_admin_user, get_admin_or_employee_user
+from utilities.bulk import BULK_CREATE_LIMIT, validate_items, \
+    raise_item_errors, insert_rows
+from utilities.cache import invalidate_cache, invalidate_items
+from utilities.query_utils import apply_filters, apply_sort, get_sort_regex, \
+    get_fields_regex, select_fields, get_ids_regex, parse_ids, find_by_ids
 
 router = APIRouter()
 
 session = get_db_session()
 
+PERSON_SORT_FIELDS = ('id', 'name', 'lastname', 'date_of_birth')
+PERSON_FIELDS = tuple(PersonRead.__fields__)
+
+
+def invalidate_credited_films(column, value: int):
+    """
+    Invalidate the cached detail of the films where a person or role is
+    credited, so a rename is shown on the detail
+
+    Args:
+        column: Column of FilmPersonRole (person_id / role_id)
+        value (int): Id of the person or role
+    """
+    statement = select(FilmPersonRole.film_id).where(
+        column == value).distinct()
+    for film_id in session.exec(statement).all():
+        invalidate_film_detail(film_id)
+
 
 # Person Related Routes
 @router.get('/api/persons', response_model=List[PersonRead],
             status_code=status.HTTP_200_OK)
 @cache_one_month()
-async def get_all_persons():
+async def get_all_persons(
+        person_type: Optional[str] = Query(None,
+                                           regex='^(film related|client)$'),
+        sort: Optional[str] = Query(None,
+                                    regex=get_sort_regex(PERSON_SORT_FIELDS)),
+        fields: Optional[str] = Query(None,
+                                      regex=get_fields_regex(PERSON_FIELDS)),
+        ids: Optional[str] = Query(None, regex=get_ids_regex())):
     session.rollback()
-    statement = select(Person)
+    if ids:
+        results = find_by_ids(session, Person, PersonRead, parse_ids(ids),
+                              get_by_id_a_person, 'person_id',
+                              ONE_DAY_IN_SECONDS)
+        return JSONResponse(content=results)
+
+    statement = apply_filters(select(Person),
+                              equals=[(Person.person_type, person_type)])
+    statement = apply_sort(statement, Person, sort)
+
+    if fields:
+        results = select_fields(session, statement, Person, fields)
+        return JSONResponse(content=jsonable_encoder(results))
+
     results = session.exec(statement).all()
 
     return results
 
 
+# Cached one day, the ages are refreshed daily
 @router.get('/api/persons/{person_id}', response_model=PersonRead)
-@cache_one_month()
+@cache_one_day()
 async def get_by_id_a_person(person_id: int):
     session.rollback()
     statement = select(Person).where(Person.id == person_id)
     result = session.exec(statement).first()
 
-    return result
+    return jsonable_encoder(result)
 
 
 @router.post('/api/persons', response_model=PersonRead,
@@ -53,10 +106,58 @@ async def create_a_person(person: PersonCreate):
     session.add(new_person)
 
     session.commit()
+    Autocomplete.add('person', new_person.id, Autocomplete.get_person_label(
+        new_person.name, new_person.lastname))
+    invalidate_cache(get_by_id_a_person, person_id=new_person.id)
 
     return new_person
 
 
+@router.post('/api/persons/bulk', response_model=List[PersonRead],
+             status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(get_admin_user)])
+async def create_persons_in_bulk(
+        persons: List[Dict[str, Any]] = Body(
+            ..., min_items=1, max_items=BULK_CREATE_LIMIT)):
+    session.rollback()
+    new_persons, errors = validate_items(persons, PersonCreate)
+    # Nothing is created if any person is invalid
+    raise_item_errors(errors)
+
+    results = insert_rows(session, Person,
+                          [dict(person.dict(),
+                                age=Person.get_age(person.date_of_birth))
+                           for person in new_persons])
+    session.commit()
+    Autocomplete.add_many('person', (
+        (person['id'], Autocomplete.get_person_label(person['name'],
+                                                     person['lastname']))
+        for person in results))
+    invalidate_items(get_by_id_a_person, 'person_id',
+                     [person['id'] for person in results])
+
+    return results
+
+
+@router.post('/api/persons/import', dependencies=[Depends(get_admin_user)])
+async def import_persons(
+        file: UploadFile = File(...),
+        file_format: Optional[str] = Query(None, regex='^(csv|ndjson)$'),
+        batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=50000)):
+    file_format = file_format or PersonImport.get_file_format(file.filename)
+    if file_format is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Unknown file format, send file_format "
+                                   "csv or ndjson")
+
+    # The upload is decoded line by line, one batch is kept in memory and a
+    # progress line with the errors of the batch is streamed after each one
+    progress = PersonImport.import_rows(
+        PersonImport.read_rows(file.file, file_format), batch_size)
+    return StreamingResponse((f'{batch.json()}\n' for batch in progress),
+                             media_type='application/x-ndjson')
+
+
 @router.put('/api/persons/{person_id}', response_model=PersonRead,
             dependencies=[Depends(get_admin_user)])
 async def update_a_person(person_id: int, person: PersonCreate):
@@ -74,6 +175,10 @@ async def update_a_person(person_id: int, person: PersonCreate):
         result.age = Person.get_age(result.date_of_birth)
 
     session.commit()
+    Autocomplete.add('person', result.id, Autocomplete.get_person_label(
+        result.name, result.lastname))
+    invalidate_cache(get_by_id_a_person, person_id=person_id)
+    invalidate_credited_films(FilmPersonRole.person_id, person_id)
 
     return result
 
@@ -93,6 +198,8 @@ async def delete_a_person(person_id: int):
 
     session.delete(result)
     session.commit()
+    Autocomplete.remove('person', person_id)
+    invalidate_cache(get_by_id_a_person, person_id=person_id)
 
     return result
 
@@ -145,6 +252,7 @@ async def update_a_role(role_id: int, role: RoleCreate):
     result.description = role.description
 
     session.commit()
+    invalidate_credited_films(FilmPersonRole.role_id, role_id)
 
     return result
 
@@ -205,6 +313,7 @@ async def create_a_film_person_role(role: FilmPersonRoleCreate):
     session.add(new_film_person_role)
 
     session.commit()
+    invalidate_film_detail(new_film_person_role.film_id)
 
     return new_film_person_role
 
@@ -219,12 +328,15 @@ async def update_a_film_person_role(film_person_role_id: int,
         FilmPersonRole.id == film_person_role_id)
 
     result = session.exec(statement).first()
+    previous_film_id = result.film_id
 
     result.film_id = film_person_role.film_id
     result.person_id = film_person_role.person_id
     result.role_id = film_person_role.role_id
 
     session.commit()
+    invalidate_film_detail(previous_film_id)
+    invalidate_film_detail(result.film_id)
 
     return result
 
@@ -245,6 +357,7 @@ async def delete_a_film_person_role(film_person_role_id: int):
 
     session.delete(result)
     session.commit()
+    invalidate_film_detail(result.film_id)
 
     return result
 
@@ -252,8 +365,15 @@ async def delete_a_film_person_role(film_person_role_id: int):
 @router.get('/api/clients', response_model=List[ClientRead],
             status_code=status.HTTP_200_OK)
 @cache_one_month()
-async def get_all_clients():
+async def get_all_clients(
+        ids: Optional[str] = Query(None, regex=get_ids_regex())):
     session.rollback()
+    if ids:
+        results = find_by_ids(session, Client, ClientRead, parse_ids(ids),
+                              get_by_id_a_client, 'client_id',
+                              ONE_MONTH_IN_SECONDS)
+        return JSONResponse(content=results)
+
     statement = select(Client)
     results = session.exec(statement).all()
 
@@ -267,7 +387,26 @@ async def get_by_id_a_client(client_id: int):
     statement = select(Client).where(Client.id == client_id)
     result = session.exec(statement).first()
 
-    return result
+    return jsonable_encoder(result)
+
+
+@router.get('/api/clients/{client_id}/rents',
+            response_model=List[RentHistoryRead],
+            dependencies=[Depends(get_admin_or_employee_user)])
+async def get_rents_of_a_client(client_id: int,
+                                before_start_date: Optional[date] = None,
+                                before_id: Optional[int] = None,
+                                limit: int = Query(50, ge=1, le=500)):
+    session.rollback()
+    statement = select(Client.id).where(Client.id == client_id)
+
+    if session.exec(statement).one_or_none() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Resource Not Found")
+
+    # Keyset pagination, send the start_date and id of the last rent
+    return Rent.find_rents_by_client_id(client_id, limit, before_start_date,
+                                        before_id)
 
 
 @router.post('/api/clients', response_model=ClientRead,
@@ -283,6 +422,7 @@ async def create_a_client(client: ClientCreate):
     session.add(new_client)
 
     session.commit()
+    invalidate_cache(get_by_id_a_client, client_id=new_client.id)
 
     return new_client
 
@@ -301,6 +441,7 @@ async def update_a_client(client_id: int, client: Client):
     result.email = client.email
 
     session.commit()
+    invalidate_cache(get_by_id_a_client, client_id=client_id)
 
     return result
 
@@ -320,5 +461,6 @@ async def delete_a_client(client_id: int):
 
     session.delete(result)
     session.commit()
+    invalidate_cache(get_by_id_a_client, client_id=client_id)
 
     return result
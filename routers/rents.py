@@ -1,31 +1,72 @@
-from typing import List
+from datetime import date
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi_redis_cache import cache_one_month
 from sqlmodel import select
 from starlette import status
 
 from databases.db import get_db_session
-from models.films_and_rents import RentRead, Rent, RentCreate
+from models.films_and_rents import RentRead, Rent, RentCreate, \
+    RentOverdueRead
+from models.leaderboard import FilmLeaderboard
+from models.reports import RevenueRollup
 from security.security import get_admin_or_employee_user
+from utilities.query_utils import apply_filters, apply_sort, get_sort_regex, \
+    get_fields_regex, select_fields
 
 router = APIRouter()
 
 session = get_db_session()
 
+RENT_SORT_FIELDS = ('id', 'start_date', 'return_date', 'cost')
+RENT_FIELDS = tuple(RentRead.__fields__)
+
 
 # Rent Related Routes
 @router.get('/api/rents', response_model=List[RentRead],
             status_code=status.HTTP_200_OK)
 @cache_one_month()
-async def get_all_rents():
+async def get_all_rents(
+        state: Optional[str] = Query(None, regex='^(open|close)$'),
+        film_id: Optional[int] = None,
+        client_id: Optional[int] = None,
+        start_date_from: Optional[date] = None,
+        start_date_to: Optional[date] = None,
+        sort: Optional[str] = Query(None,
+                                    regex=get_sort_regex(RENT_SORT_FIELDS)),
+        fields: Optional[str] = Query(None,
+                                      regex=get_fields_regex(RENT_FIELDS))):
     session.rollback()
-    statement = select(Rent)
+    statement = apply_filters(
+        select(Rent),
+        equals=[(Rent.state, state), (Rent.film_id, film_id),
+                (Rent.client_id, client_id)],
+        ranges=[(Rent.start_date, start_date_from, start_date_to)])
+    statement = apply_sort(statement, Rent, sort)
+
+    if fields:
+        results = select_fields(session, statement, Rent, fields)
+        return JSONResponse(content=jsonable_encoder(results))
+
     results = session.exec(statement).all()
 
     return results
 
 
+@router.get('/api/rents/overdue', response_model=List[RentOverdueRead],
+            dependencies=[Depends(get_admin_or_employee_user)])
+async def get_overdue_rents(after_return_date: Optional[date] = None,
+                            after_id: Optional[int] = None,
+                            limit: int = Query(100, ge=1, le=1000)):
+    session.rollback()
+    # Keyset pagination, send the return_date and id of the last rent
+    return Rent.find_overdue_rents(date.today(), limit, after_return_date,
+                                   after_id)
+
+
 @router.get('/api/rents/{rent_id}', response_model=RentRead)
 @cache_one_month()
 async def get_by_id_a_rent(rent_id: int):
@@ -51,8 +92,11 @@ async def create_a_rent(rent: RentCreate):
                     cost=Rent.get_cost(rent))
 
     session.add(new_rent)
+    RevenueRollup.apply_rent(session, new_rent.film_id, new_rent.start_date,
+                             1, new_rent.cost)
 
     session.commit()
+    FilmLeaderboard.add_rent(new_rent.film_id, new_rent.start_date, 1)
 
     return new_rent
 
@@ -64,6 +108,9 @@ async def update_a_rent(rent_id: int, rent: RentCreate):
     statement = select(Rent).where(Rent.id == rent_id)
 
     result = session.exec(statement).first()
+    RevenueRollup.apply_rent(session, result.film_id, result.start_date, -1,
+                             -(result.cost or 0))
+    previous_film_id, previous_start_date = result.film_id, result.start_date
 
     result.film_id = rent.film_id
     result.client_id = rent.client_id
@@ -74,8 +121,14 @@ async def update_a_rent(rent_id: int, rent: RentCreate):
     result.state = rent.state
     if result:
         result.cost = Rent.get_cost(rent)
+    RevenueRollup.apply_rent(session, result.film_id, result.start_date, 1,
+                             result.cost)
 
     session.commit()
+    if (previous_film_id, previous_start_date) != (result.film_id,
+                                                   result.start_date):
+        FilmLeaderboard.add_rent(previous_film_id, previous_start_date, -1)
+        FilmLeaderboard.add_rent(result.film_id, result.start_date, 1)
 
     return result
 
@@ -93,7 +146,10 @@ async def delete_a_rent(rent_id: int):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Resource Not Found")
 
+    RevenueRollup.apply_rent(session, result.film_id, result.start_date, -1,
+                             -(result.cost or 0))
     session.delete(result)
     session.commit()
+    FilmLeaderboard.add_rent(result.film_id, result.start_date, -1)
 
     return result
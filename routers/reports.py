@@ -0,0 +1,49 @@
+from datetime import date
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette import status
+
+from databases.db import get_db_session
+from models.reports import RevenueRollup, RevenueByDayRead, \
+    RevenueByCategoryRead, RevenueByFilmRead
+from security.security import get_admin_user
+
+router = APIRouter()
+
+session = get_db_session()
+
+
+def validate_period(start_date: date, end_date: date):
+    if start_date > end_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="start_date can't be after end_date")
+
+
+# Report Related Routes, they only read the revenue rollups
+@router.get('/api/reports/revenue/days',
+            response_model=List[RevenueByDayRead],
+            dependencies=[Depends(get_admin_user)])
+async def get_revenue_by_day(start_date: date, end_date: date):
+    session.rollback()
+    validate_period(start_date, end_date)
+    return RevenueRollup.get_revenue_by_day(start_date, end_date)
+
+
+@router.get('/api/reports/revenue/categories',
+            response_model=List[RevenueByCategoryRead],
+            dependencies=[Depends(get_admin_user)])
+async def get_revenue_by_category(start_date: date, end_date: date):
+    session.rollback()
+    validate_period(start_date, end_date)
+    return RevenueRollup.get_revenue_by_category(start_date, end_date)
+
+
+@router.get('/api/reports/revenue/films',
+            response_model=List[RevenueByFilmRead],
+            dependencies=[Depends(get_admin_user)])
+async def get_revenue_by_film(start_date: date, end_date: date,
+                              limit: int = Query(100, ge=1, le=1000)):
+    session.rollback()
+    validate_period(start_date, end_date)
+    return RevenueRollup.get_revenue_by_film(start_date, end_date, limit)
@@ -0,0 +1,108 @@
+import asyncio
+from contextlib import suppress
+from typing import List
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from s3_events.storage import StorageService
+from utilities.logger import Logger
+
+'''
+Background deletion of the objects that are not referenced anymore
+'''
+
+
+class StorageDeletionQueue(object):
+    """
+    Collect the keys of the removed posters and delete them from the storage
+    in batches on a background task, so the requests never wait for the
+    storage round trip.
+
+    The queue lives in the memory of the worker, the keys still pending when
+    the process dies are cleaned up by the "postersreconcile" command.
+    """
+    max_batch_size = 1000
+
+    def __init__(self, storage_service: StorageService,
+                 flush_interval: float = 5):
+        self.storage_service = storage_service
+        self.flush_interval = flush_interval
+        self.queue = None
+        self.task = None
+        # Keys taken from the queue and not flushed yet, kept here so they
+        # are not lost if the task is cancelled
+        self.batch = []
+
+    def put(self, key: str):
+        """
+        Queue the key of an object to delete
+
+        Args:
+            key (str): Key of the object in the storage
+        """
+        if self.queue is None:
+            Logger.warning(f"Deletion queue not started, {key} will be "
+                           f"orphaned")
+            return
+        self.queue.put_nowait(key)
+
+    async def get_batch(self) -> List[str]:
+        """
+        Wait for the first key and collect the keys queued during the flush
+        interval, up to the max batch size. The interval is skipped when a
+        full batch is already queued. The keys are collected on self.batch
+
+        Return:
+            keys (List[str]): Keys to delete
+        """
+        keys = self.batch
+        keys.append(await self.queue.get())
+        # Sleep instead of waiting on the queue with a timeout, wait_for can
+        # swallow the cancellation of the task when a key arrives at the
+        # same time
+        if self.queue.qsize() < self.max_batch_size - len(keys):
+            await asyncio.sleep(self.flush_interval)
+
+        while len(keys) < self.max_batch_size and not self.queue.empty():
+            keys.append(self.queue.get_nowait())
+        return keys
+
+    async def flush(self, keys: List[str]):
+        """
+        Delete the keys from the storage
+
+        Args:
+            keys (List[str]): Keys to delete
+        """
+        try:
+            deleted = await self.storage_service.delete_objects(keys)
+            Logger.info(f"Deleted {deleted} of {len(keys)} objects "
+                        f"from the storage")
+        except (BotoCoreError, ClientError, OSError) as error:
+            Logger.error(f"Failed to delete {len(keys)} objects from the "
+                         f"storage: {error}")
+
+    async def run(self):
+        while True:
+            await self.flush(await self.get_batch())
+            self.batch = []
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self.task
+        self.task = None
+
+        # The batch being collected or flushed when the task was cancelled
+        # is flushed again with the keys still queued
+        keys, self.batch = self.batch, []
+        while not self.queue.empty():
+            keys.append(self.queue.get_nowait())
+        if keys:
+            await self.flush(keys)
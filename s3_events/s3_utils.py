@@ -1,4 +1,5 @@
 import aiobotocore
+from botocore.exceptions import ClientError
 
 from utilities.logger import Logger
 
@@ -15,12 +16,15 @@ class S3_SERVICE(object):
         self.aws_secret_access_key = aws_secret_access_key
         self.region = region
 
-    async def upload_fileobj(self, fileobject, bucket, key):
+    def get_session_client(self):
         session = aiobotocore.get_session()
-        async with session.create_client(
-                's3', region_name=self.region,
-                aws_secret_access_key=self.aws_secret_access_key,
-                aws_access_key_id=self.aws_access_key_id) as client:
+        return session.create_client(
+            's3', region_name=self.region,
+            aws_secret_access_key=self.aws_secret_access_key,
+            aws_access_key_id=self.aws_access_key_id)
+
+    async def upload_fileobj(self, fileobject, bucket, key):
+        async with self.get_session_client() as client:
             file_upload_response = await client.put_object(
                 Bucket=bucket,
                 Key=key,
@@ -33,3 +37,43 @@ class S3_SERVICE(object):
                             f"{bucket}.s3.{self.region}.amazonaws.com/{key}")
                 return True
         return False
+
+    async def generate_presigned_put(self, bucket, key, content_type,
+                                     expires_in):
+        async with self.get_session_client() as client:
+            return client.generate_presigned_url(
+                'put_object',
+                Params={'Bucket': bucket,
+                        'Key': key,
+                        'ContentType': content_type},
+                ExpiresIn=expires_in)
+
+    async def object_exists(self, bucket, key):
+        async with self.get_session_client() as client:
+            try:
+                await client.head_object(Bucket=bucket, Key=key)
+            except ClientError as error:
+                if error.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                    return False
+                raise
+            return True
+
+    async def delete_objects(self, bucket, keys):
+        async with self.get_session_client() as client:
+            response = await client.delete_objects(
+                Bucket=bucket,
+                Delete={'Objects': [{'Key': key} for key in keys],
+                        'Quiet': True})
+
+            for error in response.get('Errors', []):
+                Logger.error(f"Failed to delete {error['Key']}: "
+                             f"{error['Message']}")
+            return len(keys) - len(response.get('Errors', []))
+
+    async def list_objects(self, bucket, prefix, page_size):
+        async with self.get_session_client() as client:
+            paginator = client.get_paginator('list_objects_v2')
+            async for page in paginator.paginate(
+                    Bucket=bucket, Prefix=prefix,
+                    PaginationConfig={'PageSize': page_size}):
+                yield page.get('Contents', [])
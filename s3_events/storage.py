@@ -0,0 +1,298 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from functools import partial
+from typing import AsyncIterator, List, Optional
+
+import aiofiles
+from dotenv import load_dotenv
+
+from s3_events.s3_utils import S3_SERVICE
+from utilities.logger import Logger
+
+load_dotenv()  # take environment variables from .env.
+
+'''
+Storage backends used to keep the poster assets
+'''
+
+
+class StorageService(object):
+    """
+    Base class of the storage backends, every backend store the objects
+    under a key and expose them through a public url
+    """
+    key_prefix = ''
+    # The backend can generate the urls of generate_presigned_upload
+    supports_presigned_uploads = False
+
+    def build_key(self, filename: str) -> str:
+        """
+        Return the key where the file is going to be stored
+
+        Args:
+            filename (str): Unique name of the file
+
+        Return:
+            key (str): Key of the object in the storage
+        """
+        return f'{self.key_prefix}{filename}'
+
+    async def upload_fileobj(self, fileobject, key: str) -> bool:
+        """
+        Store the file object under the given key
+
+        Args:
+            fileobject: Binary file object to store
+            key (str): Key of the object in the storage
+
+        Return:
+            uploaded (bool): True if the object was stored
+        """
+        raise NotImplementedError
+
+    async def delete_objects(self, keys: List[str]) -> int:
+        """
+        Delete the objects stored under the given keys
+
+        Args:
+            keys (List[str]): Keys of the objects in the storage
+
+        Return:
+            deleted (int): Amount of deleted objects
+        """
+        raise NotImplementedError
+
+    def list_keys(self, page_size: int,
+                  modified_before: datetime = None
+                  ) -> AsyncIterator[List[str]]:
+        """
+        Iterate page by page over the keys stored under the key prefix
+
+        Args:
+            page_size (int): Maximum amount of keys by page
+            modified_before (datetime): Only list the objects modified before
+            this moment (UTC)
+
+        Return:
+            pages (AsyncIterator[List[str]]): Pages of keys
+        """
+        raise NotImplementedError
+
+    async def object_exists(self, key: str) -> bool:
+        """
+        Check if an object is stored under the given key
+
+        Args:
+            key (str): Key of the object in the storage
+
+        Return:
+            exists (bool): True if the object exists
+        """
+        raise NotImplementedError
+
+    async def generate_presigned_upload(self, key: str, content_type: str,
+                                        expires_in: int) -> str:
+        """
+        Return an url that allows to upload the object directly to the
+        storage without passing through the API, only available on the
+        backends with supports_presigned_uploads
+
+        Args:
+            key (str): Key of the object in the storage
+            content_type (str): Content type that the upload has to send
+            expires_in (int): Seconds until the url expires
+
+        Return:
+            upload_url (str): Presigned url to upload the object with PUT
+        """
+        raise NotImplementedError
+
+    def get_url(self, key: str) -> str:
+        """
+        Return the public url of the object
+
+        Args:
+            key (str): Key of the object in the storage
+
+        Return:
+            url (str): Public url of the object
+        """
+        raise NotImplementedError
+
+    def get_key(self, url: str) -> Optional[str]:
+        """
+        Return the key of the object published on the url
+
+        Args:
+            url (str): Public url of the object
+
+        Return:
+            key (str): Key of the object, None if the url doesn't belong to
+            the storage
+        """
+        base_url = self.get_url('')
+        if url.startswith(base_url):
+            return url[len(base_url):]
+        return None
+
+
+class S3StorageService(StorageService):
+    """
+    Store the objects in an AWS S3 bucket
+    """
+    supports_presigned_uploads = True
+
+    def __init__(self, aws_access_key_id, aws_secret_access_key, region,
+                 bucket, key_prefix):
+        self.s3_client = S3_SERVICE(aws_access_key_id, aws_secret_access_key,
+                                    region)
+        self.region = region
+        self.bucket = bucket
+        self.key_prefix = key_prefix or ''
+
+    async def upload_fileobj(self, fileobject, key: str) -> bool:
+        return await self.s3_client.upload_fileobj(bucket=self.bucket,
+                                                   key=key,
+                                                   fileobject=fileobject)
+
+    async def delete_objects(self, keys: List[str]) -> int:
+        deleted = 0
+        # DeleteObjects accept at most 1000 keys by call
+        for index in range(0, len(keys), 1000):
+            deleted += await self.s3_client.delete_objects(
+                bucket=self.bucket, keys=keys[index:index + 1000])
+        return deleted
+
+    async def list_keys(self, page_size: int,
+                        modified_before: datetime = None
+                        ) -> AsyncIterator[List[str]]:
+        async for objects in self.s3_client.list_objects(
+                bucket=self.bucket, prefix=self.key_prefix,
+                page_size=page_size):
+            yield [item['Key'] for item in objects
+                   if modified_before is None
+                   or item['LastModified'] < modified_before]
+
+    async def object_exists(self, key: str) -> bool:
+        return await self.s3_client.object_exists(bucket=self.bucket, key=key)
+
+    async def generate_presigned_upload(self, key: str, content_type: str,
+                                        expires_in: int) -> str:
+        return await self.s3_client.generate_presigned_put(
+            bucket=self.bucket,
+            key=key,
+            content_type=content_type,
+            expires_in=expires_in)
+
+    def get_url(self, key: str) -> str:
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+
+class LocalStorageService(StorageService):
+    """
+    Store the objects in a directory of the local filesystem, it allows to
+    develop and load test the uploads without an AWS account
+    """
+    chunk_size = 1024 * 1024
+
+    def __init__(self, root_path, base_url, key_prefix):
+        self.root_path = root_path
+        self.base_url = base_url.rstrip('/')
+        self.key_prefix = key_prefix or ''
+
+    def get_path(self, key: str) -> str:
+        """
+        Return the path of the object in the local filesystem
+
+        Args:
+            key (str): Key of the object in the storage
+
+        Return:
+            path (str): Path of the file
+        """
+        return os.path.join(self.root_path, *key.split('/'))
+
+    async def upload_fileobj(self, fileobject, key: str) -> bool:
+        path = self.get_path(key)
+        # The file object is read on the executor too, it can be a spooled
+        # file rolled over to the disk
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, partial(
+            os.makedirs, os.path.dirname(path), exist_ok=True))
+
+        async with aiofiles.open(path, 'wb') as file:
+            while chunk := await loop.run_in_executor(None, fileobject.read,
+                                                      self.chunk_size):
+                await file.write(chunk)
+
+        Logger.info(f"File uploaded path : {path}")
+        return True
+
+    def remove_files(self, keys: List[str]) -> int:
+        deleted = 0
+        for key in keys:
+            try:
+                os.remove(self.get_path(key))
+                deleted += 1
+            except FileNotFoundError:
+                Logger.warning(f"File not found: {key}")
+        return deleted
+
+    async def delete_objects(self, keys: List[str]) -> int:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.remove_files, keys)
+
+    async def list_keys(self, page_size: int,
+                        modified_before: datetime = None
+                        ) -> AsyncIterator[List[str]]:
+        page = []
+        for directory, _, filenames in os.walk(self.root_path):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                key = os.path.relpath(path, self.root_path).replace(os.sep,
+                                                                    '/')
+                modified = datetime.fromtimestamp(os.path.getmtime(path),
+                                                  tz=timezone.utc)
+
+                if not key.startswith(self.key_prefix) or (
+                        modified_before and modified >= modified_before):
+                    continue
+
+                page.append(key)
+                if len(page) == page_size:
+                    yield page
+                    page = []
+        if page:
+            yield page
+
+    async def object_exists(self, key: str) -> bool:
+        return os.path.isfile(self.get_path(key))
+
+    def get_url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+def get_storage_service() -> StorageService:
+    """
+    Return the storage backend defined by the environment variable
+    "STORAGE_BACKEND" (S3 / Local)
+
+    Return:
+        storage_service (StorageService): Storage backend
+    """
+    storage_backend = os.environ.get("STORAGE_BACKEND", "S3")
+    Logger.info(f"storage_backend:{storage_backend}")
+
+    if storage_backend == "Local":
+        return LocalStorageService(
+            root_path=os.environ.get("LOCAL_STORAGE_PATH", "media"),
+            base_url=os.environ.get("LOCAL_STORAGE_URL", "/media"),
+            key_prefix=os.environ.get("LOCAL_STORAGE_KEY", "posters/"))
+
+    return S3StorageService(
+        aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
+        region=os.environ.get("AWS_REGION"),
+        bucket=os.environ.get("S3_Bucket"),
+        key_prefix=os.environ.get("S3_Key"))
@@ -0,0 +1,180 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import cast, func, insert, literal, select as sa_select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel, select
+from starlette import status
+
+load_dotenv()  # take environment variables from .env.
+
+'''
+Bulk creation of items validated as a whole and inserted in one transaction
+'''
+
+# Maximum amount of items of a bulk request
+BULK_CREATE_LIMIT = int(os.environ.get("BULK_CREATE_LIMIT", 10000))
+
+
+def get_item_error(index: int, loc: Tuple, msg: str,
+                   error_type: str) -> Dict[str, Any]:
+    """
+    Return an error of an item in the format of the validation errors of
+    FastAPI, the location starts with the index of the item in the body
+
+    Args:
+        index (int): Index of the item in the body
+        loc (Tuple): Location of the error in the item
+        msg (str): Error message
+        error_type (str): Error type
+
+    Return:
+        error (Dict[str, Any]): Error of the item
+    """
+    return {'loc': ['body', index, *loc], 'msg': msg, 'type': error_type}
+
+
+def validate_items(items: List[Dict[str, Any]], create_model
+                   ) -> Tuple[List[Optional[SQLModel]], List[Dict[str, Any]]]:
+    """
+    Validate every item with the create model, collecting the errors of all
+    the items instead of stopping at the first one
+
+    Args:
+        items (List[Dict[str, Any]]): Items of the body
+        create_model: Create model of the items
+
+    Return:
+        valid_items (List[Optional[SQLModel]]): Validated item of each index,
+        None where the item is invalid
+        errors (List[Dict[str, Any]]): Errors of the invalid items
+    """
+    valid_items = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            valid_items.append(create_model.parse_obj(item))
+        except ValidationError as error:
+            valid_items.append(None)
+            errors.extend(get_item_error(index, item_error['loc'],
+                                         item_error['msg'],
+                                         item_error['type'])
+                          for item_error in error.errors())
+    return valid_items, errors
+
+
+def get_values(items: List[Optional[SQLModel]],
+               field: str) -> Dict[Any, List[int]]:
+    values = {}
+    for index, item in enumerate(items):
+        if item is not None and getattr(item, field) is not None:
+            values.setdefault(getattr(item, field), []).append(index)
+    return values
+
+
+def check_unique(db_session: Session, items: List[Optional[SQLModel]],
+                 column, field: str, errors: List[Dict[str, Any]]):
+    """
+    Add an error to the items whose value is already stored or repeated by
+    a previous item, checked with one query
+
+    Args:
+        db_session (Session): Session where the values are searched
+        items (List[Optional[SQLModel]]): Validated items
+        column: Unique column of the table
+        field (str): Field of the items stored in the column
+        errors (List[Dict[str, Any]]): Errors of the items
+    """
+    values = get_values(items, field)
+    if not values:
+        return
+
+    stored = set(db_session.exec(
+        select(column).where(column.in_(list(values)))))
+    for value, indexes in values.items():
+        if value in stored:
+            errors.extend(get_item_error(index, (field,),
+                                         f'{field} already exists',
+                                         'value_error.unique')
+                          for index in indexes)
+        else:
+            errors.extend(get_item_error(index, (field,),
+                                         f'{field} is repeated in the request',
+                                         'value_error.unique')
+                          for index in indexes[1:])
+
+
+def check_exists(db_session: Session, items: List[Optional[SQLModel]],
+                 column, field: str, errors: List[Dict[str, Any]]):
+    """
+    Add an error to the items that reference a row that doesn't exist,
+    checked with one query
+
+    Args:
+        db_session (Session): Session where the rows are searched
+        items (List[Optional[SQLModel]]): Validated items
+        column: Referenced column (e.g. Category.id)
+        field (str): Field of the items with the reference
+        errors (List[Dict[str, Any]]): Errors of the items
+    """
+    values = get_values(items, field)
+    if not values:
+        return
+
+    stored = set(db_session.exec(
+        select(column).where(column.in_(list(values)))))
+    for value, indexes in values.items():
+        if value not in stored:
+            errors.extend(get_item_error(index, (field,),
+                                         f'{field} does not exist',
+                                         'value_error.missing_reference')
+                          for index in indexes)
+
+
+def raise_item_errors(errors: List[Dict[str, Any]]):
+    """
+    Reject the whole request if any item has errors
+
+    Args:
+        errors (List[Dict[str, Any]]): Errors of the items
+
+    Raises:
+        HTTPException: 422 with the errors sorted by item
+    """
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=sorted(errors, key=lambda error: error['loc'][1]))
+
+
+def insert_rows(db_session: Session, model,
+                rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Insert the rows with one INSERT ... SELECT unnest(...) RETURNING on
+    the transaction of the session, the caller commits. Each column is sent
+    as one array, so the statement has a bind parameter by column whatever
+    the amount of rows (PostgreSQL only)
+
+    Args:
+        db_session (Session): Session of the transaction
+        model: Table model of the rows
+        rows (List[Dict[str, Any]]): Values of each row, all with the same
+        keys
+
+    Return:
+        created (List[Dict[str, Any]]): Stored values of each row, with the
+        generated id
+    """
+    table = model.__table__
+    columns = [table.c[name] for name in rows[0]]
+    arrays = [func.unnest(cast(literal([row[column.name] for row in rows],
+                                       ARRAY(column.type)),
+                               ARRAY(column.type))).label(column.name)
+              for column in columns]
+    statement = insert(table).from_select(
+        columns, sa_select(*arrays)).returning(*table.columns)
+    return [dict(row._mapping) for row in db_session.execute(statement)]
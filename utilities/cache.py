@@ -0,0 +1,110 @@
+from typing import Any, Callable, Dict, List
+
+from fastapi_redis_cache import FastApiRedisCache
+from fastapi_redis_cache.util import deserialize_json, serialize_json
+from redis.exceptions import RedisError
+
+from utilities.logger import Logger
+
+
+def invalidate_cache(route: Callable, **kwargs):
+    """
+    Remove the cached response of a route decorated with a fastapi_redis_cache
+    decorator
+
+    Args:
+        route (Callable): Decorated route
+        **kwargs: Arguments of the cached call
+    """
+    redis_cache = FastApiRedisCache()
+    if redis_cache.not_connected:
+        return
+
+    key = redis_cache.get_cache_key(route.__wrapped__, **kwargs)
+    try:
+        redis_cache.redis.delete(key)
+    except RedisError as error:
+        Logger.error(f"Failed to invalidate the cache key {key}: {error}")
+
+
+def invalidate_items(route: Callable, id_arg: str, ids: List[int]):
+    """
+    Remove with one DELETE the cached responses of a get by id route
+
+    Args:
+        route (Callable): Decorated get by id route
+        id_arg (str): Name of the id argument of the route
+        ids (List[int]): Ids of the items
+    """
+    redis_cache = FastApiRedisCache()
+    if redis_cache.not_connected or not ids:
+        return
+
+    keys = [redis_cache.get_cache_key(route.__wrapped__, **{id_arg: item_id})
+            for item_id in ids]
+    try:
+        redis_cache.redis.delete(*keys)
+    except RedisError as error:
+        Logger.error(f"Failed to invalidate {len(keys)} cache keys: {error}")
+
+
+def get_cached_items(route: Callable, id_arg: str,
+                     ids: List[int]) -> Dict[int, Any]:
+    """
+    Read with one MGET the cached responses of a get by id route
+
+    Args:
+        route (Callable): Decorated get by id route
+        id_arg (str): Name of the id argument of the route
+        ids (List[int]): Ids of the items
+
+    Return:
+        items (Dict[int, Any]): Cached response of each id found in the cache
+    """
+    redis_cache = FastApiRedisCache()
+    if redis_cache.not_connected or not ids:
+        return {}
+
+    keys = [redis_cache.get_cache_key(route.__wrapped__, **{id_arg: item_id})
+            for item_id in ids]
+    try:
+        values = redis_cache.redis.mget(keys)
+    except RedisError as error:
+        Logger.error(f"Failed to read {len(keys)} cache keys: {error}")
+        return {}
+
+    items = {}
+    for item_id, value in zip(ids, values):
+        if value is not None:
+            item = deserialize_json(value)
+            # Not found responses are cached as null
+            if item is not None:
+                items[item_id] = item
+    return items
+
+
+def cache_items(route: Callable, id_arg: str, items: Dict[int, Any],
+                expire: int):
+    """
+    Write the responses of a get by id route, so the next calls of the route
+    or batch lookups find them in the cache
+
+    Args:
+        route (Callable): Decorated get by id route
+        id_arg (str): Name of the id argument of the route
+        items (Dict[int, Any]): JSON serializable response of each id
+        expire (int): Seconds until the responses expire
+    """
+    redis_cache = FastApiRedisCache()
+    if redis_cache.not_connected or not items:
+        return
+
+    pipeline = redis_cache.redis.pipeline()
+    for item_id, item in items.items():
+        key = redis_cache.get_cache_key(route.__wrapped__,
+                                        **{id_arg: item_id})
+        pipeline.set(key, serialize_json(item), ex=expire)
+    try:
+        pipeline.execute()
+    except RedisError as error:
+        Logger.error(f"Failed to cache {len(items)} items: {error}")
@@ -1,6 +1,29 @@
+import logging
 import string
-from random import randint, uniform, randrange, choices
+from bisect import bisect
+from itertools import accumulate
+from random import randint, uniform, randrange, choices, Random
 from datetime import datetime, timedelta, date
+from typing import List, Sequence, Tuple
+
+from business_logic.business_logic import (RentBusinessLogic,
+                                           amount_day_max_limit)
+
+# Dataset profiles used to seed production shaped data (records by table)
+DATASET_PROFILES = {
+    'small': {'categories': 20, 'films': 1000, 'seasons': 500,
+              'chapters': 2000, 'roles': 20, 'persons': 5000,
+              'clients': 2000, 'films_persons_roles': 10000,
+              'rents': 50000},
+    'medium': {'categories': 50, 'films': 50000, 'seasons': 20000,
+               'chapters': 100000, 'roles': 50, 'persons': 200000,
+               'clients': 100000, 'films_persons_roles': 500000,
+               'rents': 1000000},
+    'large': {'categories': 100, 'films': 500000, 'seasons': 200000,
+              'chapters': 1000000, 'roles': 100, 'persons': 2000000,
+              'clients': 1000000, 'films_persons_roles': 5000000,
+              'rents': 10000000},
+}
 
 
 def get_random_string(string_len: int):
@@ -73,3 +96,142 @@ def gen_phone():
 
 def gen_number(start, end):
     return randint(start, end)
+
+
+def get_zipf_cum_weights(amount: int, exponent: float) -> List[float]:
+    """
+    Return the cumulative weights of a Zipf distribution, where the item of
+    rank k has a weight of 1 / k^exponent
+
+    Args:
+        amount (int): Amount of ranked items
+        exponent (float): Exponent of the distribution
+
+    Return:
+        cum_weights (List[float]): Cumulative weights by rank
+    """
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, amount + 1)))
+
+
+def gen_zipf_index(rng: Random, cum_weights: Sequence[float]) -> int:
+    index = bisect(cum_weights, rng.random() * cum_weights[-1])
+    return min(index, len(cum_weights) - 1)
+
+
+def gen_rent_days(rng: Random) -> int:
+    # Log-normal with a median of ~4 days, limited to the max rent days
+    days = round(rng.lognormvariate(1.3, 0.5))
+    return max(1, min(amount_day_max_limit, days))
+
+
+def gen_rent_amount(rng: Random) -> int:
+    return rng.choices((1, 2, 3), weights=(80, 15, 5))[0]
+
+
+def gen_rent(rng: Random, film_id: int, price_by_day: float, client_id: int,
+             until: date, history_days: int) -> dict:
+    """
+    Generate a rent with a realistic shape, the rents that end before
+    "until" are mostly closed, some of them late, and a few are still open
+    and overdue
+
+    Args:
+        rng (Random): Random generator
+        film_id (int): Film of the rent
+        price_by_day (float): The price by day of renting the film
+        client_id (int): Client of the rent
+        until (date): Date of the most recent rent
+        history_days (int): Amount of days of rent history
+
+    Return:
+        rent (dict): Mapping of the rent
+    """
+    amount = gen_rent_amount(rng)
+    days = gen_rent_days(rng)
+    start_date = until - timedelta(days=rng.randint(0, history_days))
+    return_date = start_date + timedelta(days=days)
+    actual_return_date = None
+    state = 'open'
+
+    if return_date < until and rng.random() >= 0.03:
+        state = 'close'
+        if rng.random() < 0.15:
+            # Late return
+            actual_return_date = min(
+                until, return_date + timedelta(days=rng.randint(1, 5)))
+        else:
+            actual_return_date = start_date + timedelta(
+                days=rng.randint(1, days))
+
+    cost = RentBusinessLogic.get_rent_cost(amount, start_date, return_date,
+                                           actual_return_date, price_by_day)
+
+    return dict(film_id=film_id,
+                client_id=client_id,
+                amount=amount,
+                start_date=start_date,
+                return_date=return_date,
+                actual_return_date=actual_return_date,
+                state=state,
+                cost=cost if cost != 'N.A' else None)
+
+
+# Data shared by the rents generator processes, set by init_rents_worker
+rents_worker_data = {}
+
+
+def init_rents_worker(film_ids: Sequence[int], film_prices: Sequence[float],
+                      client_ids: Sequence[int], zipf_exponent: float,
+                      seed: int, until: date, history_days: int):
+    """
+    Keep the data shared by all the rent chunks in the worker process, the
+    films are ranked by popularity in the given order
+
+    Args:
+        film_ids (Sequence[int]): Film ids ordered by popularity
+        film_prices (Sequence[float]): Price by day of each film
+        client_ids (Sequence[int]): Client ids
+        zipf_exponent (float): Exponent of the films popularity
+        seed (int): Seed of the dataset
+        until (date): Date of the most recent rent
+        history_days (int): Amount of days of rent history
+    """
+    # The rent cost is logged as debug, too verbose for millions of rents
+    logging.disable(logging.DEBUG)
+
+    rents_worker_data.update(
+        film_ids=film_ids,
+        film_prices=film_prices,
+        client_ids=client_ids,
+        cum_weights=get_zipf_cum_weights(len(film_ids), zipf_exponent),
+        seed=seed,
+        until=until,
+        history_days=history_days)
+
+
+def gen_rents_chunk(chunk: Tuple[int, int]) -> List[dict]:
+    """
+    Generate a chunk of rents, every chunk has its own seed so the dataset
+    is the same whatever the amount of worker processes
+
+    Args:
+        chunk (Tuple[int, int]): Position of the chunk in the dataset and
+        amount of rents of the chunk
+
+    Return:
+        rents (List[dict]): Mappings of the rents
+    """
+    chunk_index, count = chunk
+    data = rents_worker_data
+    rng = Random(data['seed'] * 1000003 + chunk_index)
+
+    rents = []
+    for i in range(count):
+        film_index = gen_zipf_index(rng, data['cum_weights'])
+        client_index = rng.randrange(len(data['client_ids']))
+        rents.append(gen_rent(rng, data['film_ids'][film_index],
+                              data['film_prices'][film_index],
+                              data['client_ids'][client_index],
+                              data['until'], data['history_days']))
+    return rents
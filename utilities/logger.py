@@ -54,13 +54,17 @@ class Logger:
         Returns:
             logger (logging.Logger): Logger
         """
+        # Create Film Rental System list logger
+        logger_app_file = logging.getLogger("Film Rental System file")
+
+        # The handler is created only once by process
+        if logger_app_file.handlers:
+            return logger_app_file
+
         # Initialize environ
         # Load virtual variables
         load_dotenv()  # take environment variables from .env.
 
-        # Create Film Rental System list logger
-        logger_app_file = logging.getLogger("Film Rental System file")
-
         try:
             # Create handler
             handler_file = logging.FileHandler(os.getenv('LOG_FILE_PATH'))
@@ -85,6 +89,10 @@ class Logger:
                                                 " list terminal")
         logger_app_terminal.setLevel(logging.DEBUG)
 
+        # The handler is created only once by process
+        if logger_app_terminal.handlers:
+            return logger_app_terminal
+
         # Create handler
         handler_terminal = logging.StreamHandler()
 
@@ -144,6 +152,10 @@ class Logger:
         Args:
             message (str): Message to log
         """
+        # Skip the handlers when the debug messages are disabled
+        if logging.root.manager.disable >= logging.DEBUG:
+            return
+
         # Write message into the file
         logger_app_file = cls.get_logger_app_file()
         if logger_app_file is not None:
@@ -0,0 +1,58 @@
+import asyncio
+from contextlib import suppress
+from typing import Callable
+
+from utilities.logger import Logger
+
+'''
+Batch jobs executed periodically on background by the API workers
+'''
+
+
+class PeriodicJob(object):
+    """
+    Run a blocking job every interval on a thread of the default executor,
+    so the requests are never blocked by the batch.
+
+    The jobs have to be idempotent, every worker of the API runs its own
+    schedule. A job is disabled with an interval of 0.
+    """
+
+    def __init__(self, name: str, job: Callable[[], int],
+                 interval_seconds: float):
+        self.name = name
+        self.job = job
+        self.interval_seconds = interval_seconds
+        self.task = None
+
+    async def run_once(self):
+        """
+        Run the job one time and log the amount of affected rows, a failed
+        run is logged and the schedule goes on
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            affected_rows = await loop.run_in_executor(None, self.job)
+            Logger.info(f"Periodic job {self.name}: {affected_rows} "
+                        f"rows affected")
+        except Exception as error:
+            Logger.error(f"Periodic job {self.name} failed: {error}")
+
+    async def run(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self.interval_seconds <= 0:
+            Logger.info(f"Periodic job {self.name} disabled")
+            return
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self.task
+        self.task = None
@@ -0,0 +1,132 @@
+import bisect
+import heapq
+from typing import Dict, Iterable, List, Set, Tuple
+
+'''
+In memory index to autocomplete labels by prefix
+'''
+
+
+class PrefixIndex(object):
+    """
+    Sorted array of the terms of the labels, the terms that start with a
+    prefix are contiguous and found with a binary search. Every label is
+    indexed from each of its words, so "kni" finds "The Dark Knight"
+    """
+
+    def __init__(self):
+        self.terms: List[Tuple[str, int]] = []
+        self.labels: Dict[int, str] = {}
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return ' '.join(text.casefold().split())
+
+    @classmethod
+    def get_terms(cls, label: str) -> Set[str]:
+        """
+        Return the terms of the label, the label from each of its words
+
+        Args:
+            label (str): Label to index
+
+        Return:
+            terms (Set[str]): Normalized terms of the label
+        """
+        words = cls.normalize(label).split(' ')
+        return {' '.join(words[index:]) for index in range(len(words))}
+
+    def load(self, items: Iterable[Tuple[int, str]]):
+        """
+        Replace the content of the index, sorting once all the terms
+
+        Args:
+            items (Iterable[Tuple[int, str]]): Id and label of each item
+        """
+        labels = {item_id: label for item_id, label in items if label}
+        terms = sorted((term, item_id) for item_id, label in labels.items()
+                       for term in self.get_terms(label))
+        # The index can be loaded on a thread while it's searched
+        self.terms, self.labels = terms, labels
+
+    def add(self, item_id: int, label: str):
+        """
+        Index the label of the item, replacing the previous one
+
+        Args:
+            item_id (int): Id of the item
+            label (str): Label of the item
+        """
+        self.remove(item_id)
+        if not label:
+            return
+        self.labels[item_id] = label
+        for term in self.get_terms(label):
+            bisect.insort(self.terms, (term, item_id))
+
+    def add_many(self, items: Iterable[Tuple[int, str]]):
+        """
+        Index many labels, merging their sorted terms with the terms of the
+        index in one pass instead of inserting them one by one
+
+        Args:
+            items (Iterable[Tuple[int, str]]): Id and label of each item
+        """
+        # An id given more than once keeps its last label
+        items = {item_id: label for item_id, label in items if label}
+        for item_id in items:
+            self.remove(item_id)
+
+        new_terms = sorted((term, item_id) for item_id, label in items.items()
+                           for term in self.get_terms(label))
+        labels = dict(self.labels)
+        labels.update(items)
+        self.terms, self.labels = list(heapq.merge(self.terms,
+                                                   new_terms)), labels
+
+    def remove(self, item_id: int):
+        """
+        Remove the item from the index, if it's indexed
+
+        Args:
+            item_id (int): Id of the item
+        """
+        label = self.labels.pop(item_id, None)
+        if label is None:
+            return
+        for term in self.get_terms(label):
+            index = bisect.bisect_left(self.terms, (term, item_id))
+            if index < len(self.terms) and self.terms[index] == (term,
+                                                                 item_id):
+                del self.terms[index]
+
+    def search(self, prefix: str, limit: int) -> List[Tuple[str, int, str]]:
+        """
+        Return the items with a term that starts with the prefix, in the
+        order of the terms
+
+        Args:
+            prefix (str): Text written by the user
+            limit (int): Maximum amount of items
+
+        Return:
+            items (List[Tuple[str, int, str]]): Matched term, id and label of
+            each item
+        """
+        prefix = self.normalize(prefix)
+        if not prefix:
+            return []
+
+        terms, labels = self.terms, self.labels
+        items = []
+        found = set()
+        index = bisect.bisect_left(terms, (prefix,))
+        while index < len(terms) and len(items) < limit:
+            term, item_id = terms[index]
+            if not term.startswith(prefix):
+                break
+            if item_id not in found and item_id in labels:
+                found.add(item_id)
+                items.append((term, item_id, labels[item_id]))
+            index += 1
+        return items
@@ -0,0 +1,198 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, \
+    Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from sqlmodel import SQLModel, select
+
+from utilities.cache import cache_items, get_cached_items
+
+'''
+Whitelisted filters, sorting, fields and batch lookups of the list routes
+'''
+
+# Maximum amount of ids of a batch lookup
+BATCH_IDS_LIMIT = 100
+
+
+def get_sort_regex(fields: Sequence[str]) -> str:
+    """
+    Return the regex that validates the "sort" query parameter: comma
+    separated fields of the whitelist, a "-" before a field sorts it in
+    descending order (e.g. "-release_date,title")
+
+    Args:
+        fields (Sequence[str]): Fields that can be sorted
+
+    Return:
+        regex (str): Regex of the sort parameter
+    """
+    field = f"-?({'|'.join(fields)})"
+    # \Z instead of $, that also matches before a trailing newline
+    return rf'^{field}(,{field})*\Z'
+
+
+def apply_filters(statement: Select,
+                  equals: Iterable[Tuple[Any, Any]] = (),
+                  ranges: Iterable[Tuple[Any, Any, Any]] = ()) -> Select:
+    """
+    Add the filters that have a value to the statement, the filters without
+    value (None) are ignored
+
+    Args:
+        statement (Select): Statement to filter
+        equals (Iterable[Tuple]): Column and value of the equality filters
+        ranges (Iterable[Tuple]): Column, lower and upper bound (inclusive)
+        of the range filters
+
+    Return:
+        statement (Select): Filtered statement
+    """
+    for column, value in equals:
+        if value is not None:
+            statement = statement.where(column == value)
+
+    for column, lower, upper in ranges:
+        if lower is not None:
+            statement = statement.where(column >= lower)
+        if upper is not None:
+            statement = statement.where(column <= upper)
+    return statement
+
+
+def apply_sort(statement: Select, model, sort: Optional[str]) -> Select:
+    """
+    Sort the statement by the fields of the sort parameter, the id is always
+    the last key so the order is stable. The fields have to be validated with
+    the regex of get_sort_regex
+
+    Args:
+        statement (Select): Statement to sort
+        model: Table model of the statement
+        sort (str): Sort parameter (e.g. "-release_date,title")
+
+    Return:
+        statement (Select): Sorted statement
+    """
+    order_by = []
+    names = set()
+    for field in (sort or '').split(','):
+        if not field:
+            continue
+        name = field.lstrip('-')
+        if name in names:
+            continue
+        names.add(name)
+        column = getattr(model, name)
+        order_by.append(column.desc() if field.startswith('-') else column)
+
+    if 'id' not in names:
+        order_by.append(model.id)
+    return statement.order_by(*order_by)
+
+
+def get_fields_regex(fields: Sequence[str]) -> str:
+    """
+    Return the regex that validates the "fields" query parameter: comma
+    separated fields of the whitelist (e.g. "id,title")
+
+    Args:
+        fields (Sequence[str]): Fields that can be requested
+
+    Return:
+        regex (str): Regex of the fields parameter
+    """
+    field = f"({'|'.join(fields)})"
+    return rf'^{field}(,{field})*\Z'
+
+
+def select_fields(db_session: Session, statement: Select, model,
+                  fields: str, expressions: Dict[str, Any] = None
+                  ) -> List[Dict[str, Any]]:
+    """
+    Execute the statement selecting only the requested fields, so the
+    other columns are neither read nor serialized. The fields have to be
+    validated with the regex of get_fields_regex
+
+    Args:
+        db_session (Session): Session where the statement is executed
+        statement (Select): Filtered and sorted statement of the model
+        model: Table model of the statement
+        fields (str): Fields parameter (e.g. "id,title")
+        expressions (Dict[str, Any]): SQL expressions of the fields that are
+        not columns of the table
+
+    Return:
+        rows (List[Dict[str, Any]]): Requested fields of each row
+    """
+    expressions = expressions or {}
+    columns = []
+    for name in dict.fromkeys(fields.split(',')):
+        if name in expressions:
+            columns.append(expressions[name].label(name))
+        else:
+            columns.append(getattr(model, name))
+
+    statement = statement.with_only_columns(*columns)
+    return [dict(row._mapping) for row in db_session.execute(statement)]
+
+
+def get_ids_regex(limit: int = BATCH_IDS_LIMIT) -> str:
+    """
+    Return the regex that validates the "ids" query parameter: up to limit
+    comma separated ids (e.g. "1,2,3")
+
+    Args:
+        limit (int): Maximum amount of ids
+
+    Return:
+        regex (str): Regex of the ids parameter
+    """
+    return rf'^\d+(,\d+){{0,{limit - 1}}}\Z'
+
+
+def parse_ids(ids: str) -> List[int]:
+    """
+    Return the ids of the ids parameter without duplicates, in the given
+    order. The parameter has to be validated with the regex of get_ids_regex
+
+    Args:
+        ids (str): Ids parameter (e.g. "1,2,3")
+
+    Return:
+        ids (List[int]): Ids
+    """
+    return list(dict.fromkeys(int(item_id) for item_id in ids.split(',')))
+
+
+def find_by_ids(db_session: Session, model, read_model: SQLModel,
+                ids: List[int], route: Callable, id_arg: str,
+                expire: int) -> List[Dict[str, Any]]:
+    """
+    Return the items with the given ids, the cached responses of the get by
+    id route are used and the rest is read with one IN query and cached
+
+    Args:
+        db_session (Session): Session where the missing items are read
+        model: Table model of the items
+        read_model (SQLModel): Read model of the get by id route
+        ids (List[int]): Ids of the items
+        route (Callable): Get by id route decorated with a cache decorator
+        id_arg (str): Name of the id argument of the route
+        expire (int): Seconds of the cache of the route
+
+    Return:
+        items (List[Dict[str, Any]]): Items found, in the order of the ids
+    """
+    items = get_cached_items(route, id_arg, ids)
+
+    missing = [item_id for item_id in ids if item_id not in items]
+    if missing:
+        statement = select(model).where(model.id.in_(missing))
+        found = {item.id: jsonable_encoder(read_model.from_orm(item))
+                 for item in db_session.exec(statement)}
+        cache_items(route, id_arg, found, expire)
+        items.update(found)
+
+    return [items[item_id] for item_id in ids if item_id in items]
@@ -0,0 +1,145 @@
+import re
+import unittest
+
+from sqlmodel import select
+
+from models.films_and_rents import Film
+from utilities.prefix_index import PrefixIndex
+from utilities.query_utils import (get_sort_regex, apply_sort,
+                                   get_fields_regex, get_ids_regex,
+                                   parse_ids)
+
+
+class PrefixIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.load([(1, 'The Dark Knight'), (2, 'Dark Star'),
+                         (3, 'Alien'), (4, None)])
+
+    def get_ids(self, prefix: str, limit: int = 10):
+        items = self.index.search(prefix, limit)
+        return [item_id for _, item_id, _ in items]
+
+    def test_load(self):
+        self.assertEqual(self.index.labels, {1: 'The Dark Knight',
+                                             2: 'Dark Star', 3: 'Alien'})
+        self.assertEqual(self.index.terms, sorted(self.index.terms))
+
+    def test_get_terms(self):
+        self.assertEqual(PrefixIndex.get_terms('The  Dark Knight'),
+                         {'the dark knight', 'dark knight', 'knight'})
+
+    def test_search(self):
+        # Every word of the label is a prefix, the case is ignored and the
+        # items are in the order of the matched terms
+        self.assertEqual(self.get_ids('dark'), [1, 2])
+        self.assertEqual(self.get_ids('KNI'), [1])
+        self.assertEqual(self.get_ids('  dark   kn'), [1])
+        self.assertEqual(self.index.search('ali', 10),
+                         [('alien', 3, 'Alien')])
+        self.assertEqual(self.get_ids('predator'), [])
+        self.assertEqual(self.get_ids('   '), [])
+
+    def test_search_limit(self):
+        self.assertEqual(self.get_ids('dark', limit=1), [1])
+        # An item matched by many terms counts once
+        self.index.add(5, 'Star Star')
+        self.assertEqual(self.get_ids('star', limit=2), [2, 5])
+
+    def test_add(self):
+        self.index.add(5, 'Dark City')
+        self.assertEqual(self.get_ids('dark c'), [5])
+        self.assertEqual(self.index.terms, sorted(self.index.terms))
+
+    def test_add_replaces_label(self):
+        self.index.add(2, 'Solaris')
+        self.assertEqual(self.get_ids('dark'), [1])
+        self.assertEqual(self.get_ids('sol'), [2])
+
+        # An empty label removes the item
+        self.index.add(2, '')
+        self.assertEqual(self.get_ids('sol'), [])
+        self.assertNotIn(2, self.index.labels)
+
+    def test_add_many(self):
+        self.index.add_many([(5, 'Dark City'), (3, 'Aliens'), (6, None)])
+        self.assertEqual(self.get_ids('dark'), [5, 1, 2])
+        self.assertEqual(self.index.search('alien', 10),
+                         [('aliens', 3, 'Aliens')])
+        self.assertNotIn(6, self.index.labels)
+        self.assertEqual(self.index.terms, sorted(self.index.terms))
+
+    def test_add_many_repeated_id(self):
+        # The last label of the id is kept
+        self.index.add_many([(5, 'Dark City'), (5, 'Solaris')])
+        self.assertEqual(self.index.labels[5], 'Solaris')
+        self.assertEqual(self.get_ids('dark'), [1, 2])
+        self.assertEqual(self.get_ids('sol'), [5])
+
+    def test_remove(self):
+        self.index.remove(1)
+        self.assertEqual(self.get_ids('dark'), [2])
+        self.assertEqual(self.get_ids('knight'), [])
+        self.assertEqual(len(self.index.terms), 3)
+
+        # Removing an item that isn't indexed does nothing
+        self.index.remove(99)
+        self.assertEqual(len(self.index.terms), 3)
+
+
+class QueryUtilsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.sort_fields = ('id', 'title', 'release_date')
+
+    def get_order_by(self, sort):
+        statement = apply_sort(select(Film), Film, sort)
+        return [str(clause) for clause in statement._order_by_clauses]
+
+    def test_get_sort_regex(self):
+        regex = get_sort_regex(self.sort_fields)
+        for sort in ('title', '-release_date,title', 'id,-title'):
+            self.assertIsNotNone(re.match(regex, sort), sort)
+        # Only the fields of the whitelist, comma separated
+        for sort in ('', 'description', 'title,', ',title', '--title',
+                     'title;drop', '__class__', 'titles', 'title,stock',
+                     'title\n'):
+            self.assertIsNone(re.match(regex, sort), sort)
+
+    def test_get_fields_regex(self):
+        regex = get_fields_regex(self.sort_fields)
+        self.assertIsNotNone(re.match(regex, 'id,title'))
+        for fields in ('', '-title', 'id,', 'metadata', 'id,__table__',
+                       'id\n'):
+            self.assertIsNone(re.match(regex, fields), fields)
+
+    def test_apply_sort(self):
+        self.assertEqual(self.get_order_by('-release_date,title'),
+                         ['film.release_date DESC', 'film.title',
+                          'film.id'])
+        self.assertEqual(self.get_order_by(None), ['film.id'])
+
+    def test_apply_sort_id_once(self):
+        # The id is the last key only if it's not requested
+        self.assertEqual(self.get_order_by('-id,title'),
+                         ['film.id DESC', 'film.title'])
+        self.assertEqual(self.get_order_by('title,id,-title,-id'),
+                         ['film.title', 'film.id'])
+
+    def test_get_ids_regex(self):
+        regex = get_ids_regex(limit=3)
+        for ids in ('1', '1,2,3', '10,10'):
+            self.assertIsNotNone(re.match(regex, ids), ids)
+        for ids in ('', ',', '1,', ',1', '1,,2', '-1', '1.5', 'a',
+                    '1,2,3,4', '1\n'):
+            self.assertIsNone(re.match(regex, ids), ids)
+
+        # The default limit
+        self.assertIsNotNone(re.match(get_ids_regex(),
+                                      ','.join(['1'] * 100)))
+        self.assertIsNone(re.match(get_ids_regex(), ','.join(['1'] * 101)))
+
+    def test_parse_ids(self):
+        self.assertEqual(parse_ids('3,1,3,2,1'), [3, 1, 2])
+        self.assertEqual(parse_ids('007'), [7])
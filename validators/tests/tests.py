@@ -7,7 +7,8 @@ from validators.validators import (validator_date_limit_today,
                                    validate_email, validate_phone,
                                    validate_film_type, validate_gender,
                                    validate_person_type_client,
-                                   validate_rent_state)
+                                   validate_rent_state,
+                                   validate_poster_extension)
 
 
 def fake_today():
@@ -79,6 +80,16 @@ class ValidationsTestCase(unittest.TestCase):
         self.assertEqual("open", validate_rent_state('open'))
         self.assertEqual("close", validate_rent_state("close"))
 
+    def test_validate_poster_extension(self):
+        with self.assertRaises(AssertionError):
+            validate_poster_extension('.gif')
+
+        with self.assertRaises(AssertionError):
+            validate_poster_extension('png')
+
+        self.assertEqual(".png", validate_poster_extension('.png'))
+        self.assertEqual(".jpg", validate_poster_extension('.JPG'))
+
     @patch("validators.validators.date")
     def test_validator_date_limit_today(self, mock_today):
         # Set mock
@@ -6,7 +6,6 @@ from sqlmodel import select
 
 from business_logic.business_logic import RentBusinessLogic
 from databases.db import get_db_session
-from models.films_and_rents import Film
 
 session = get_db_session()
 
@@ -59,7 +58,16 @@ def validate_rent_state(film_type: str) -> str:
     return film_type
 
 
+def validate_poster_extension(extension: str) -> str:
+    if extension.lower() not in ('.png', '.jpg', '.jpeg'):
+        raise AssertionError('extension should be .png, .jpg or .jpeg')
+    return extension.lower()
+
+
 def validate_amount(amount: int, film_id: int):
+    # Imported here because the film models import this module
+    from models.films_and_rents import Film
+
     statement = select(Film).where(Film.id == film_id)
     film = session.exec(statement).one_or_none()
 